@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-request overhead with and without connection pooling.
+
+Starts the bundled stub server (no LLM needed) and compares a fresh requests.post per call against the pooled LLMClient session.
+"""
+
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add src to path
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+import requests
+
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "300"))
+THREADS = int(os.getenv("BENCH_THREADS", "4"))
+
+
+def timed(fn, n: int) -> list[float]:
+    """Run fn n times and return per-call latencies in milliseconds."""
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def timed_threads(fn, n: int, threads: int) -> float:
+    """Run fn n times over a thread pool and return mean ms per call."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: fn(), range(n)))
+    return (time.perf_counter() - start) * 1000 / n
+
+
+def report(label: str, samples: list[float]):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"  {label:<22} mean {statistics.mean(samples):6.3f} ms   "
+          f"p50 {statistics.median(samples):6.3f} ms   p95 {p95:6.3f} ms")
+
+
+def main():
+    from sinner.stub_server import StubServer
+
+    server = StubServer().start()
+    base_url = server.base_url
+    os.environ["LMSTUDIO_BASE_URL"] = base_url
+
+    from sinner.core.llm_client import LLMClient
+
+    client = LLMClient(pool_size=THREADS, use_cache=False)
+    payload = {"model": client.model, "messages": [{"role": "user", "content": "hi"}], "temperature": 0.7}
+
+    def fresh():
+        resp = requests.post(f"{base_url}/chat/completions", headers=client.headers, json=payload, timeout=30)
+        resp.raise_for_status()
+        resp.json()
+
+    def pooled():
+        client.ask("hi")
+
+    # Warm up both paths
+    fresh()
+    pooled()
+
+    print("=" * 60)
+    print(f"Connection overhead ({REQUESTS} requests, local stub)")
+    print("=" * 60)
+    print("\nSequential:")
+    report("before: requests.post", timed(fresh, REQUESTS))
+    report("after: pooled session", timed(pooled, REQUESTS))
+
+    print(f"\n{THREADS} threads:")
+    print(f"  {'before: requests.post':<22} {timed_threads(fresh, REQUESTS, THREADS):6.3f} ms/request")
+    print(f"  {'after: pooled session':<22} {timed_threads(pooled, REQUESTS, THREADS):6.3f} ms/request")
+
+    client.close()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
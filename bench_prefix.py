@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time to first token of a mixed command stream with and without
+prompt prefix caching (SINNER_PROMPT_CACHE, llama.cpp slots).
+
+Runs against the bundled stub server set up like a llama.cpp server: it
+processes prompt tokens at a fixed rate, except the prefix a slot still
+holds from its last prompt. Set BENCH_URL (e.g. http://localhost:8080/v1)
+to run the same scenarios against a real llama.cpp server instead.
+"""
+
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+PREFILL_TOKENS_PER_S = float(os.getenv("BENCH_PREFILL_TOKENS_PER_S", "2000"))
+SLOTS = int(os.getenv("BENCH_SLOTS", "4"))
+RUNS = int(os.getenv("BENCH_RUNS", "3"))
+BENCH_URL = os.getenv("BENCH_URL", "")
+
+# (label, SINNER_PROMPT_CACHE, SINNER_SLOTS)
+SCENARIOS = [
+    ("off", "off", "0"),
+    ("cache_prompt", "on", "1"),
+    ("slot per command", "auto", "0"),
+]
+
+
+def measure(controller, corpus) -> list[float]:
+    """TTFT in ms of every request, the corpus interleaved like a real session."""
+    samples = []
+    for _ in range(RUNS):
+        for command, text in corpus:
+            start = time.perf_counter()
+            first = []
+            controller.run(command, text, on_token=lambda t: first or first.append(time.perf_counter()))
+            samples.append((first[0] - start) * 1000 if first else 0.0)
+    return samples
+
+
+def main():
+    from sinner.stub_server import StubConfig, StubServer
+
+    server = None
+    if BENCH_URL:
+        os.environ["LMSTUDIO_BASE_URL"] = BENCH_URL
+    else:
+        server = StubServer(StubConfig(prefill_tokens_per_s=PREFILL_TOKENS_PER_S, slots=SLOTS)).start()
+        os.environ["LMSTUDIO_BASE_URL"] = server.base_url
+
+    from sinner.core import Controller, LLMClient
+    from sinner.core.bench import CORPUS
+
+    where = BENCH_URL or f"stub, {SLOTS} slots, prefill {PREFILL_TOKENS_PER_S:.0f} tokens/s"
+    print("=" * 72)
+    print(f"Mixed commands, TTFT ({len(CORPUS)} requests x {RUNS} runs, {where})")
+    print("=" * 72)
+    baseline = None
+    for label, mode, slots in SCENARIOS:
+        os.environ["SINNER_PROMPT_CACHE"] = mode
+        os.environ["SINNER_SLOTS"] = slots
+        if server:
+            server.prefill_tokens = server.cached_tokens = 0
+            server._slots = [[] for _ in range(SLOTS)]  # Cold cache for every scenario
+        with LLMClient(use_cache=False) as client:
+            samples = measure(Controller(client), CORPUS)
+        p50 = statistics.median(samples)
+        baseline = baseline or p50
+        line = f"  {label:<18} TTFT p50 {p50:7.1f} ms   p95 {statistics.quantiles(samples, n=20)[-1]:7.1f} ms"
+        if server:
+            saved = server.cached_tokens / PREFILL_TOKENS_PER_S * 1000 / len(samples)
+            line += f"   prefill saved {saved:6.1f} ms/request"
+        print(f"{line}   ({baseline / p50:4.1f}x)")
+
+    if server:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: wall-clock time of one-line commands with and without
+per-command generation profiles (max_tokens, stop sequences).
+
+Runs against the bundled stub server set up like a chatty model: it
+generates at a fixed token rate and keeps writing explanations after the
+one line that matters until it hits max_tokens or a stop sequence.
+"""
+
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+TOKENS_PER_S = float(os.getenv("BENCH_TOKENS_PER_S", "400"))
+RUNS = int(os.getenv("BENCH_RUNS", "5"))
+DEFAULT_MAX_TOKENS = 300  # What the server generates when the client sets no limit
+
+RAMBLE = "This commit message follows the conventional format because it clearly states the change."
+
+
+def measure(controller, command: str) -> list[float]:
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        controller.run(command, "added user authentication with JWT tokens")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    from sinner.stub_server import StubConfig, StubServer
+
+    server = StubServer(StubConfig(tokens_per_s=TOKENS_PER_S, ramble=RAMBLE, max_tokens=DEFAULT_MAX_TOKENS)).start()
+    os.environ["LMSTUDIO_BASE_URL"] = server.base_url
+
+    from sinner.core import Controller, LLMClient, prompts
+
+    controller = Controller(LLMClient(use_cache=False))
+    profiles = prompts.GENERATION_PROFILES
+
+    print("=" * 60)
+    print(f"One-line commands ({RUNS} runs each, stub at {TOKENS_PER_S:.0f} tokens/s)")
+    print("=" * 60)
+    for command in ("name", "commit", "squash"):
+        # Before: temperature only, the model decides when to stop
+        prompts.GENERATION_PROFILES = {k: {"temperature": v["temperature"]} for k, v in profiles.items()}
+        before = statistics.median(measure(controller, command))
+        prompts.GENERATION_PROFILES = profiles
+        after = statistics.median(measure(controller, command))
+        print(f"  {command:<8} before {before:8.1f} ms   after {after:7.1f} ms   ({before / after:4.1f}x faster)")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
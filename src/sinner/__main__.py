@@ -4,9 +4,12 @@ CLI entrypoint for sinner.
 
 import typer
 from typing import Optional
-from sinner.core.controller import Controller
+from sinner.utils.config import load_config
 from sinner.utils.git_integration import GitIntegration
 
+# The HTTP client, controller and .env are loaded inside the commands that
+# need them, so --help, --version and stats start fast
+
 app = typer.Typer(
     name="sinner",
     help="local-first CLI agent that turns messy intent into clean output",
@@ -25,6 +28,8 @@ local-first CLI agent · private by design
 
 SIGNATURE = "══ zero fluff, pure function ══"
 
+PROFILING = False  # Set by --profile
+
 
 def echo_result(result: str):
     """Echo result with signature line."""
@@ -32,9 +37,49 @@ def echo_result(result: str):
     typer.echo(f"\n{SIGNATURE}")
 
 
+def run_command(command: str, input_data: str, stream: bool = False, no_cache: bool = False, **flags):
+    """
+    Run a controller command and echo the result, streaming if asked.
+    
+    Forwards to the resident daemon when one is running, otherwise runs
+    in-process.
+    """
+    from sinner import daemon
+    
+    load_config()
+    on_token = (lambda text: typer.echo(text, nl=False)) if stream else None
+    on_notice = lambda text: typer.echo(f"note: {text}", err=True)
+    # --profile measures this process, so it skips the daemon
+    reply = None if PROFILING else daemon.forward(
+        command, input_data, on_token=on_token, no_cache=no_cache, flags=flags, on_notice=on_notice
+    )
+    if reply is not None:
+        result, ttft = reply
+    else:
+        from sinner.core.controller import Controller
+        from sinner.core.llm_client import LLMClient
+        controller = Controller(LLMClient(use_cache=False) if no_cache else None)
+        result = controller.run(command, input_data, on_token=on_token, on_notice=on_notice, **flags)
+        ttft = controller.llm.last_ttft
+    
+    if not stream:
+        echo_result(result)
+        return
+    typer.echo()
+    if ttft is not None:
+        typer.echo(f"first token: {ttft:.2f}s", err=True)
+    typer.echo(f"\n{SIGNATURE}")
+
+
+STREAM_OPTION = typer.Option(False, "--stream", "-s", help="Print output as it is generated")
+NO_CACHE_OPTION = typer.Option(False, "--no-cache", help="Skip the response cache and always ask the model")
+
+
 @app.command()
 def name(
     context: str = typer.Argument(..., help="Description of what you're naming"),
+    stream: bool = STREAM_OPTION,
+    no_cache: bool = NO_CACHE_OPTION,
 ):
     """
     Generate a professional name for a variable, function, class, or module.
@@ -43,9 +88,7 @@ def name(
         sinner name "a function that validates email addresses"
     """
     try:
-        controller = Controller()
-        result = controller.run("name", context)
-        echo_result(result)
+        run_command("name", context, stream, no_cache)
     except Exception as e:
         typer.echo(f"Error: {e}", err=True)
         raise typer.Exit(1)
@@ -53,18 +96,41 @@ def name(
 
 @app.command()
 def commit(
-    changes: str = typer.Argument(..., help="Description of your changes"),
+    changes: Optional[str] = typer.Argument(None, help="Description of your changes"),
+    staged: bool = typer.Option(False, "--staged", help="Describe the staged changes (git diff --cached)"),
+    stream: bool = STREAM_OPTION,
+    no_cache: bool = NO_CACHE_OPTION,
 ):
     """
     Generate a conventional-style commit message.
     
-    Example:
+    Examples:
         sinner commit "added user authentication with JWT tokens"
+        sinner commit --staged
+        sinner commit --staged "part of the auth rework"
     """
     try:
-        controller = Controller()
-        result = controller.run("commit", changes)
-        echo_result(result)
+        if not staged:
+            if not changes:
+                typer.echo("Error: Describe your changes, or use --staged", err=True)
+                raise typer.Exit(1)
+            run_command("commit", changes, stream, no_cache)
+            return
+        
+        if not GitIntegration.is_git_repo():
+            typer.echo("Error: Not in a git repository", err=True)
+            raise typer.Exit(1)
+        files, hunks = GitIntegration.get_staged_changes()
+        if not files:
+            typer.echo("Nothing staged (git add first)", err=True)
+            raise typer.Exit(1)
+        run_command("commit", changes or "", stream, no_cache, hunks=hunks, files=files)
+        
+    except typer.Exit:
+        raise
+    except RuntimeError as e:
+        typer.echo(f"Git error: {e}", err=True)
+        raise typer.Exit(1)
     except Exception as e:
         typer.echo(f"Error: {e}", err=True)
         raise typer.Exit(1)
@@ -74,6 +140,8 @@ def commit(
 def pr(
     count: int = typer.Option(5, "--count", "-c", help="Number of recent commits to analyze"),
     since: Optional[str] = typer.Option(None, "--since", help="Get commits since this date"),
+    stream: bool = STREAM_OPTION,
+    no_cache: bool = NO_CACHE_OPTION,
 ):
     """
     Generate a formal PR description from git history (title + bullets).
@@ -88,16 +156,14 @@ def pr(
             typer.echo("Error: Not in a git repository", err=True)
             raise typer.Exit(1)
         
-        commits = GitIntegration.get_recent_commits(count=count, since=since)
+        commits = GitIntegration.get_recent_commits_with_sha(count=count, since=since)
         
         if not commits:
             typer.echo("No commits found", err=True)
             raise typer.Exit(1)
         
-        commits_text = "\n".join(commits)
-        controller = Controller()
-        result = controller.run("pr", commits_text)
-        echo_result(result)
+        commits_text = "\n".join(subject for _, subject in commits)
+        run_command("pr", commits_text, stream, no_cache, shas=[sha for sha, _ in commits])
         
     except RuntimeError as e:
         typer.echo(f"Git error: {e}", err=True)
@@ -111,6 +177,8 @@ def pr(
 def squash(
     count: int = typer.Option(5, "--count", "-c", help="Number of recent commits to analyze"),
     since: Optional[str] = typer.Option(None, "--since", help="Get commits since this date"),
+    stream: bool = STREAM_OPTION,
+    no_cache: bool = NO_CACHE_OPTION,
 ):
     """
     Generate a single commit message for squash merges.
@@ -125,16 +193,14 @@ def squash(
             typer.echo("Error: Not in a git repository", err=True)
             raise typer.Exit(1)
         
-        commits = GitIntegration.get_recent_commits(count=count, since=since)
+        commits = GitIntegration.get_recent_commits_with_sha(count=count, since=since)
         
         if not commits:
             typer.echo("No commits found", err=True)
             raise typer.Exit(1)
         
-        commits_text = "\n".join(commits)
-        controller = Controller()
-        result = controller.run("squash", commits_text)
-        echo_result(result)
+        commits_text = "\n".join(subject for _, subject in commits)
+        run_command("squash", commits_text, stream, no_cache, shas=[sha for sha, _ in commits])
         
     except RuntimeError as e:
         typer.echo(f"Git error: {e}", err=True)
@@ -148,6 +214,8 @@ def squash(
 def comment(
     count: int = typer.Option(3, "--count", "-c", help="Number of recent commits to analyze"),
     since: Optional[str] = typer.Option(None, "--since", help="Get commits since this date"),
+    stream: bool = STREAM_OPTION,
+    no_cache: bool = NO_CACHE_OPTION,
 ):
     """
     Generate an informal, detailed summary of recent changes.
@@ -162,16 +230,14 @@ def comment(
             typer.echo("Error: Not in a git repository", err=True)
             raise typer.Exit(1)
         
-        commits = GitIntegration.get_recent_commits(count=count, since=since)
+        commits = GitIntegration.get_recent_commits_with_sha(count=count, since=since)
         
         if not commits:
             typer.echo("No commits found", err=True)
             raise typer.Exit(1)
         
-        commits_text = "\n".join(commits)
-        controller = Controller()
-        result = controller.run("comment", commits_text)
-        echo_result(result)
+        commits_text = "\n".join(subject for _, subject in commits)
+        run_command("comment", commits_text, stream, no_cache, shas=[sha for sha, _ in commits])
         
     except RuntimeError as e:
         typer.echo(f"Git error: {e}", err=True)
@@ -184,6 +250,8 @@ def comment(
 @app.command()
 def explain(
     content: str = typer.Argument(..., help="Code snippet or concept to explain"),
+    stream: bool = STREAM_OPTION,
+    no_cache: bool = NO_CACHE_OPTION,
 ):
     """
     Get a clear explanation of code or a technical concept.
@@ -192,14 +260,239 @@ def explain(
         sinner explain "what is a closure in Python?"
     """
     try:
-        controller = Controller()
-        result = controller.run("explain", content)
-        echo_result(result)
+        run_command("explain", content, stream, no_cache)
     except Exception as e:
         typer.echo(f"Error: {e}", err=True)
         raise typer.Exit(1)
 
 
+@app.command()
+def batch(
+    jobs: str = typer.Argument(..., help="JSONL file of {command, input, flags} jobs ('-' for stdin)"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="Write results here instead of stdout"),
+    workers: Optional[int] = typer.Option(None, "--workers", "-w", help="Parallel jobs (default: SINNER_CONCURRENCY)"),
+    order: str = typer.Option("input", "--order", help="Result order: input or completion"),
+    no_cache: bool = NO_CACHE_OPTION,
+):
+    """
+    Run many jobs in one process and write JSONL results.
+    
+    Each result has line, id, command, output, error and latency_ms.
+    
+    Examples:
+        sinner batch jobs.jsonl -o results.jsonl
+        cat jobs.jsonl | sinner batch - --order completion
+    """
+    import os
+    import sys
+    from sinner.core.batch import run_batch
+    from sinner.core.controller import Controller
+    from sinner.core.llm_client import LLMClient
+    
+    load_config()
+    if order not in ("input", "completion"):
+        typer.echo("Error: --order must be 'input' or 'completion'", err=True)
+        raise typer.Exit(1)
+    workers = workers or int(os.getenv("SINNER_CONCURRENCY", "4"))
+    
+    try:
+        source = sys.stdin if jobs == "-" else open(jobs, "r", encoding="utf-8")
+        sink = open(output, "w", encoding="utf-8") if output else sys.stdout
+    except OSError as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+    
+    try:
+        client = LLMClient(pool_size=workers, use_cache=False if no_cache else None)
+        summary = run_batch(Controller(client), source, sink, workers=workers, ordered=order == "input")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    
+    typer.echo(
+        f"{summary['total']} jobs, {summary['failed']} failed in {summary['elapsed_s']}s",
+        err=True
+    )
+    if summary["failed"]:
+        raise typer.Exit(1)
+
+
+@app.command()
+def bench(
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="Report file (default: bench-<timestamp>.json)"),
+    runs: int = typer.Option(1, "--runs", "-n", help="Times to run the whole corpus"),
+    no_stream: bool = typer.Option(False, "--no-stream", help="Use plain requests (no time to first token)"),
+    compare: Optional[str] = typer.Option(None, "--compare", help="Earlier report to compare against"),
+    no_cache: bool = NO_CACHE_OPTION,
+):
+    """
+    Benchmark the configured model on a fixed corpus of every command.
+
+    Reports p50/p95 latency, time to first token, tokens per second, cache
+    hit rate and the share of outputs that pass format validation, and
+    writes everything to a JSON report.
+
+    Examples:
+        sinner bench --no-cache -n 3
+        sinner bench -o gemma.json --compare qwen.json
+    """
+    import json
+    import time
+    from sinner.core import bench as suite
+    from sinner.core.controller import Controller
+    from sinner.core.llm_client import LLMClient
+
+    baseline = None
+    if compare:
+        try:
+            with open(compare, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            typer.echo(f"Error: cannot read {compare}: {e}", err=True)
+            raise typer.Exit(1)
+
+    def progress(sample: dict):
+        status = sample["error"] or ("ok" if sample["valid"] else "invalid format")
+        latency = f"{sample['latency_ms']:8.1f} ms" if sample["latency_ms"] is not None else " " * 11
+        typer.echo(f"  {sample['command']:<8} {latency}  {status}", err=True)
+
+    controller = Controller(LLMClient(use_cache=False) if no_cache else None)
+    controller.metrics_log = None  # Bench runs go to the report, not the usage log
+    typer.echo(f"Benchmarking {controller.llm.model} at {controller.llm.base_url}", err=True)
+    report = suite.run_bench(controller, runs=runs, stream=not no_stream, on_sample=progress)
+
+    output = output or time.strftime("bench-%Y%m%d-%H%M%S.json")
+    try:
+        suite.write_report(report, output)
+    except OSError as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+
+    def show(value):
+        return "-" if value is None else f"{value:g}"
+
+    typer.echo(f"\n{'metric':<16}{'value':>12}" + (f"{'baseline':>12}" if baseline else ""))
+    for metric, before, after in suite.compare(baseline or {}, report):
+        typer.echo(f"{metric:<16}{show(after):>12}" + (f"{show(before):>12}" if baseline else ""))
+    typer.echo(f"\nReport written to {output}")
+    if report["summary"]["errors"]:
+        raise typer.Exit(1)
+
+
+@app.command()
+def stats(
+    by: str = typer.Option("command", "--by", help="Group by any of command,model,day (comma-separated)"),
+    days: Optional[int] = typer.Option(None, "--days", "-d", help="Only the last N days"),
+    command: Optional[str] = typer.Option(None, "--command", help="Only this command"),
+    model: Optional[str] = typer.Option(None, "--model", help="Only this model"),
+    log: Optional[str] = typer.Option(None, "--log", help="Metrics log to read (default: SINNER_METRICS_LOG)"),
+    as_json: bool = typer.Option(False, "--json", help="Print JSON instead of a table"),
+):
+    """
+    Latency and usage report from the local metrics log.
+
+    Needs SINNER_METRICS=1 (or SINNER_METRICS_LOG) to have been set while
+    running commands. Nothing leaves your machine.
+
+    Examples:
+        sinner stats
+        sinner stats --by model,day --days 7
+        sinner stats --command pr --json
+    """
+    import json
+    from datetime import datetime, timedelta, timezone
+    from pathlib import Path
+    from sinner.core.stats import aggregate_file
+    from sinner.utils import metrics
+
+    load_config()
+    path = Path(log) if log else (metrics.log_path() or metrics.DEFAULT_METRICS_LOG)
+    if not path.exists():
+        typer.echo(f"No metrics log at {path} (enable it with SINNER_METRICS=1)", err=True)
+        raise typer.Exit(1)
+
+    fields = tuple(field.strip() for field in by.split(",") if field.strip())
+    since = None
+    if days:
+        since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    try:
+        groups = aggregate_file(path, by=fields, since=since, command=command, model=model)
+    except ValueError as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+    except OSError as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+
+    if as_json:
+        rows = [dict(zip(fields, key), **summary) for key, summary in groups.items()]
+        typer.echo(json.dumps(rows, indent=2))
+        return
+    if not groups:
+        typer.echo("No matching invocations")
+        return
+
+    def show(value, pattern="{:g}"):
+        return "-" if value is None else pattern.format(value)
+
+    widths = [max(len(field), *(len(key[i]) for key in groups)) for i, field in enumerate(fields)]
+    header = "  ".join(field.ljust(width) for field, width in zip(fields, widths))
+    typer.echo(f"{header}  {'runs':>6} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+               f"{'ttft p50':>9} {'tokens in':>10} {'tokens out':>10} {'cache hit':>9}")
+    for key, s in groups.items():
+        label = "  ".join(value.ljust(width) for value, width in zip(key, widths))
+        typer.echo(
+            f"{label}  {s['runs']:>6} {s['error_rate']:>7.1%} {show(s['p50_ms']):>9} {show(s['p95_ms']):>9} "
+            f"{show(s['p99_ms']):>9} {show(s['ttft_p50_ms']):>9} {s['prompt_tokens']:>10} "
+            f"{s['completion_tokens']:>10} {show(s['cache_hit_rate'], '{:.0%}'):>9}"
+        )
+
+
+@app.command()
+def daemon(
+    stop: bool = typer.Option(False, "--stop", help="Stop the running daemon"),
+    status: bool = typer.Option(False, "--status", help="Check whether the daemon is running"),
+):
+    """
+    Run a resident sinner that keeps the model client warm.
+    
+    While it runs, other sinner commands forward to it over a Unix socket
+    instead of starting from scratch. Set SINNER_DAEMON=0 to bypass it.
+    
+    Examples:
+        sinner daemon &
+        sinner daemon --status
+        sinner daemon --stop
+    """
+    from sinner import daemon as resident
+    
+    load_config()
+    if stop or status:
+        try:
+            reply = resident.request({"op": "stop" if stop else "ping"})
+        except resident.DaemonError as e:
+            typer.echo(f"Error: {e}", err=True)
+            raise typer.Exit(1)
+        if reply is None:
+            typer.echo("sinner daemon is not running")
+            raise typer.Exit(0 if stop else 1)
+        if stop:
+            typer.echo("sinner daemon stopped")
+        else:
+            typer.echo(f"sinner daemon running (pid {reply['pid']}, version {reply['version']})")
+        return
+    
+    try:
+        resident.serve(on_ready=lambda path: typer.echo(f"sinner daemon listening on {path}", err=True))
+    except KeyboardInterrupt:
+        pass
+    except (RuntimeError, OSError) as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+
+
 @app.command()
 def config(
     init: bool = typer.Option(False, "--init", help="Initialize global config file")
@@ -210,11 +503,7 @@ def config(
     Use --init to create ~/.config/sinner/.env
     """
     import os
-    from pathlib import Path
-    from dotenv import load_dotenv
-    
-    config_dir = Path.home() / ".config" / "sinner"
-    env_file = config_dir / ".env"
+    from sinner.utils.config import CONFIG_DIR as config_dir, ENV_FILE as env_file
     
     if init:
         # Create config directory if it doesn't exist
@@ -241,18 +530,31 @@ MODEL_ID=google/gemma-3n-e4b
         raise typer.Exit()
     
     # Show current config
+    load_config()
     if env_file.exists():
-        load_dotenv(env_file)
         typer.echo(f"Configuration file: {env_file}")
     else:
-        load_dotenv()
         typer.echo("Configuration: Using local .env (run 'sinner config --init' to create global config)")
     
     typer.echo("\nCurrent Settings:")
     typer.echo(f"  Base URL: {os.getenv('LMSTUDIO_BASE_URL', 'http://127.0.0.1:1234/v1')}")
+    if os.getenv("LMSTUDIO_BASE_URLS"):
+        typer.echo(f"  Backends: {os.getenv('LMSTUDIO_BASE_URLS')} ({os.getenv('SINNER_BALANCE', 'least_outstanding')})")
     typer.echo(f"  Model: {os.getenv('MODEL_ID', 'google/gemma-3n-e4b')}")
+    from sinner.core.routing import routes_from_env
+    try:
+        for command, chain in routes_from_env().items():
+            targets = [f"{model}@{url}" if url else model for model, url in chain]
+            typer.echo(f"  Route {command}: {' -> '.join(targets)} -> default")
+    except ValueError as e:
+        typer.echo(f"  Routes: {e}")
     typer.echo(f"  API Key: {'set' if os.getenv('LMSTUDIO_API_KEY') else 'not set (using default)'}")
 
+    from sinner.core.cache import ResponseCache
+    cache = ResponseCache()
+    stats = cache.stats()
+    typer.echo(f"  Cache: {cache.path} ({stats['entries']} entries, {stats['bytes'] / 1024 / 1024:.1f} MB)")
+
 
 def version_callback(value: bool):
     """Handle --version flag."""
@@ -265,6 +567,7 @@ def version_callback(value: bool):
 
 @app.callback()
 def main(
+    ctx: typer.Context,
     version: Optional[bool] = typer.Option(
         None,
         "--version",
@@ -273,13 +576,26 @@ def main(
         is_eager=True,
         help="Show version and exit"
     ),
+    profile: bool = typer.Option(False, "--profile", help="Print a timing breakdown to stderr"),
 ):
     """
     sinner - local-first CLI agent for developers
     
     Turn messy intent into clean, professional output.
     """
-    pass
+    global PROFILING
+    from sinner.utils import metrics
+    
+    PROFILING = profile
+    # SINNER_METRICS may only be set in .env
+    load_config()
+    # Spans are only recorded when someone will read them
+    if not profile and metrics.log_path() is None:
+        return
+    recorder = metrics.Profile()
+    if profile:
+        ctx.call_on_close(lambda: typer.echo("\n" + recorder.breakdown(), err=True))
+    ctx.with_resource(metrics.profiling(recorder))
 
 
 if __name__ == "__main__":
@@ -1,6 +1,21 @@
 """Core modules for sinner agent."""
 
-from .llm_client import LLMClient
-from .controller import Controller
+__all__ = ["LLMClient", "AsyncLLMClient", "Controller", "ResponseCache"]
 
-__all__ = ["LLMClient", "Controller"]
+# Imported on first access, so importing one light submodule (stats, cache)
+# doesn't pull in the HTTP stack
+_EXPORTS = {
+    "LLMClient": ".llm_client",
+    "Controller": ".controller",
+    "AsyncLLMClient": ".async_client",
+    "ResponseCache": ".cache",
+}
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,137 @@
+"""
+Asyncio counterpart of LLMClient.
+Runs many prompts concurrently, capped at the server's parallel slots.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Optional
+from .llm_client import LLMClient
+
+_DONE = object()
+
+
+class AsyncLLMClient:
+    """
+    Async wrapper around LLMClient with a concurrency limit.
+
+    Requests keep the exact semantics of LLMClient (same payload, cache and
+    pooled session); each one runs on a worker thread while the event loop
+    stays free. At most `concurrency` requests are in flight at once, which
+    should match the number of parallel slots the server is configured for.
+    """
+
+    def __init__(self, client: Optional[LLMClient] = None, concurrency: Optional[int] = None):
+        self.concurrency = concurrency or int(os.getenv("SINNER_CONCURRENCY", "4"))
+        self.client = client or LLMClient(pool_size=self.concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="sinner-llm")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        """Concurrency limiter for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def run_blocking(self, fn, *args):
+        """Run a blocking call on a worker thread once a slot is free."""
+        async with self.slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def ask(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        stop: Optional[list[str]] = None,
+        command: Optional[str] = None,
+        system: Optional[str] = None,
+    ) -> str:
+        """
+        Send a prompt to the LLM and return the response.
+
+        Args:
+            prompt: The prompt to send
+            temperature: The temperature for generation (default: 0.7)
+            max_tokens: Optional cap on generated tokens
+            stop: Optional stop sequences
+            command: Optional command whose route picks the model and server
+            system: Optional system message, sent ahead of the prompt
+
+        Returns:
+            The LLM's response as a string
+
+        Raises:
+            requests.exceptions.HTTPError: If the API request fails
+        """
+        return await self.run_blocking(
+            partial(self.client.ask, command=command, system=system), prompt, temperature, max_tokens, stop
+        )
+
+    async def ask_stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        stop: Optional[list[str]] = None,
+        command: Optional[str] = None,
+        system: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Send a prompt and yield response text as the server generates it.
+
+        Args:
+            prompt: The prompt to send
+            temperature: The temperature for generation (default: 0.7)
+            max_tokens: Optional cap on generated tokens
+            stop: Optional stop sequences
+            command: Optional command whose route picks the model and server
+            system: Optional system message, sent ahead of the prompt
+
+        Yields:
+            Content deltas in arrival order
+
+        Raises:
+            requests.exceptions.HTTPError: If the API request fails
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def pump():
+            try:
+                for delta in self.client.ask_stream(prompt, temperature, max_tokens, stop, command, system):
+                    if cancelled.is_set():
+                        break  # Consumer went away, closing the generator drops the connection
+                    loop.call_soon_threadsafe(queue.put_nowait, delta)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+        async with self.slots:
+            worker = loop.run_in_executor(self._executor, pump)
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is _DONE:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                cancelled.set()
+                await worker
+
+    def close(self):
+        """Stop worker threads and close pooled connections."""
+        self._executor.shutdown(wait=True)
+        self.client.close()
@@ -0,0 +1,157 @@
+"""
+Spread requests over several OpenAI-compatible servers.
+Round-robin, least-outstanding or lowest-latency picking, with failing
+servers ejected for a cooldown and readmitted once a health check passes.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+from .resilience import RETRYABLE, classify_error
+
+STRATEGIES = ("round_robin", "least_outstanding", "lowest_latency")
+
+
+class Backend:
+    """One inference server and what we have observed about it."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.latency: Optional[float] = None  # Moving average, seconds
+        self.failures = 0  # Consecutive
+        self.ejected_until = 0.0
+        self.cooldown = 0.0
+        self.probing = False
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until == 0.0
+
+    def __repr__(self):
+        return f"Backend({self.url!r})"
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Whether an error says something about the server's health."""
+    return classify_error(error) in RETRYABLE
+
+
+class Balancer:
+    """
+    Pick a backend per request and track its health.
+
+    A backend is ejected after eject_after consecutive failures. Once its
+    cooldown (doubling on every ejection, up to max_cooldown) has passed, a
+    background health check (GET /models) readmits it. If every backend is
+    ejected, the one due back soonest is used anyway rather than failing.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        strategy: str = "least_outstanding",
+        eject_after: int = 3,
+        cooldown: float = 5.0,
+        max_cooldown: float = 60.0,
+        health_check: Optional[Callable[[Backend], bool]] = None,
+    ):
+        if not urls:
+            raise ValueError("at least one backend URL is required")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown balancing strategy: '{strategy}'. Use one of: {', '.join(STRATEGIES)}")
+        self.backends = [Backend(url) for url in urls]
+        self.strategy = strategy
+        self.eject_after = eject_after
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.health_check = health_check or self._ping
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, default_url: str) -> "Balancer":
+        """
+        Build from LMSTUDIO_BASE_URLS (comma-separated, falls back to
+        default_url) and SINNER_BALANCE (strategy).
+        """
+        urls = [url.strip() for url in os.getenv("LMSTUDIO_BASE_URLS", "").split(",") if url.strip()]
+        return cls(urls or [default_url], strategy=os.getenv("SINNER_BALANCE", "least_outstanding").strip())
+
+    def pick(self, exclude: tuple = ()) -> Backend:
+        """Choose a backend for the next request (exclude: already tried)."""
+        with self._lock:
+            now = time.monotonic()
+            for backend in self.backends:
+                if not backend.healthy and now >= backend.ejected_until and not backend.probing:
+                    backend.probing = True
+                    threading.Thread(target=self._probe, args=(backend,), daemon=True).start()
+
+            candidates = [b for b in self.backends if b.healthy and b not in exclude]
+            if not candidates:
+                candidates = [b for b in self.backends if b not in exclude] or self.backends
+                return min(candidates, key=lambda b: b.ejected_until)
+
+            if self.strategy == "least_outstanding":
+                # Rotate the start so ties spread evenly
+                offset = self._next % len(candidates)
+                self._next += 1
+                rotated = candidates[offset:] + candidates[:offset]
+                return min(rotated, key=lambda b: b.outstanding)
+            if self.strategy == "lowest_latency":
+                # Unmeasured backends first, so every one gets a latency sample
+                return min(candidates, key=lambda b: -1.0 if b.latency is None else b.latency)
+            backend = candidates[self._next % len(candidates)]
+            self._next += 1
+            return backend
+
+    def acquire(self, backend: Backend):
+        """Count a request as outstanding on backend."""
+        with self._lock:
+            backend.outstanding += 1
+
+    def release(self, backend: Backend, latency: Optional[float] = None, error: Optional[BaseException] = None):
+        """Finish an acquired request, recording its latency or failure."""
+        with self._lock:
+            backend.outstanding -= 1
+        if error is not None:
+            if is_backend_failure(error):
+                self.report_failure(backend)
+        elif latency is not None:
+            self.report_success(backend, latency)
+
+    def report_success(self, backend: Backend, latency: float):
+        with self._lock:
+            backend.failures = 0
+            backend.latency = latency if backend.latency is None else 0.8 * backend.latency + 0.2 * latency
+
+    def report_failure(self, backend: Backend):
+        with self._lock:
+            backend.failures += 1
+            if backend.healthy and backend.failures >= self.eject_after:
+                backend.cooldown = min(max(backend.cooldown * 2, self.base_cooldown), self.max_cooldown)
+                backend.ejected_until = time.monotonic() + backend.cooldown
+
+    def _probe(self, backend: Backend):
+        """Health-check an ejected backend; readmit it or extend the cooldown."""
+        try:
+            ok = self.health_check(backend)
+        except Exception:
+            ok = False
+        with self._lock:
+            backend.probing = False
+            if ok:
+                backend.ejected_until = 0.0
+                backend.failures = 0
+                backend.cooldown = 0.0
+            else:
+                backend.cooldown = min(backend.cooldown * 2, self.max_cooldown)
+                backend.ejected_until = time.monotonic() + backend.cooldown
+
+    @staticmethod
+    def _ping(backend: Backend) -> bool:
+        resp = requests.get(f"{backend.url}/models", timeout=2)
+        return resp.status_code == 200
@@ -0,0 +1,128 @@
+"""
+Batch runner: many jobs through one Controller.
+Reads JSONL jobs as a stream and writes JSONL results, with flat memory.
+"""
+
+import json
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, TextIO
+from .controller import Controller
+from .resilience import classify_error
+
+
+def parse_job(line_no: int, line: str) -> dict:
+    """
+    Parse one JSONL job record.
+
+    Args:
+        line_no: 1-based line number in the input
+        line: Raw JSON text
+
+    Returns:
+        Job dict with line, id, command, input and flags
+
+    Raises:
+        ValueError: If the record is not a valid job
+    """
+    record = json.loads(line)
+    if not isinstance(record, dict) or "command" not in record:
+        raise ValueError("job must be an object with a 'command' field")
+    flags = record.get("flags") or {}
+    if not isinstance(flags, dict):
+        raise ValueError("'flags' must be an object")
+    return {
+        "line": line_no,
+        "id": record.get("id"),
+        "command": record["command"],
+        "input": record.get("input", ""),
+        "flags": flags,
+    }
+
+
+def run_job(controller: Controller, line_no: int, line: str) -> dict:
+    """Run a single job and return its result record (never raises)."""
+    start = time.perf_counter()
+    result = {"line": line_no, "id": None, "command": None, "output": None, "error": None, "error_kind": None}
+    try:
+        job = parse_job(line_no, line)
+        result["id"] = job["id"]
+        result["command"] = job["command"]
+        result["output"] = controller.run(job["command"], job["input"], **job["flags"])
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["error_kind"] = classify_error(e)
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def iter_results(
+    controller: Controller,
+    lines: Iterable[str],
+    workers: int = 4,
+    ordered: bool = True,
+) -> Iterator[dict]:
+    """
+    Run jobs on a worker pool and yield result records.
+
+    At most workers * 2 jobs are in flight, so memory stays flat no matter
+    how long the input is. In ordered mode a slow job holds back the ones
+    behind it; completion order yields each result as soon as it is done.
+
+    Args:
+        controller: Shared controller (its LLMClient pool is reused by all workers)
+        lines: JSONL job lines, read lazily
+        workers: Number of worker threads
+        ordered: Yield in input order (True) or completion order (False)
+
+    Yields:
+        Result records with line, id, command, output, error, error_kind
+        and latency_ms
+    """
+    window = workers * 2
+    pending: deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sinner-batch") as pool:
+        for line_no, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            if len(pending) >= window:
+                yield from _drain(pending, ordered, until=window - 1)
+            pending.append(pool.submit(run_job, controller, line_no, line))
+        yield from _drain(pending, ordered, until=0)
+
+
+def _drain(pending: deque, ordered: bool, until: int) -> Iterator[dict]:
+    """Yield finished results until at most `until` jobs remain in flight."""
+    while len(pending) > until:
+        if ordered:
+            yield pending.popleft().result()
+            continue
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.remove(future)
+            yield future.result()
+
+
+def run_batch(
+    controller: Controller,
+    lines: Iterable[str],
+    out: TextIO,
+    workers: int = 4,
+    ordered: bool = True,
+) -> dict:
+    """
+    Run a JSONL job stream and write one JSON result per line to out.
+
+    Returns:
+        Summary with total, failed and elapsed_s
+    """
+    start = time.perf_counter()
+    total = failed = 0
+    for result in iter_results(controller, lines, workers=workers, ordered=ordered):
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+        total += 1
+        if result["error"]:
+            failed += 1
+    return {"total": total, "failed": failed, "elapsed_s": round(time.perf_counter() - start, 2)}
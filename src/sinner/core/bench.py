@@ -0,0 +1,221 @@
+"""
+Benchmark suite: a fixed corpus through Controller.run.
+Measures latency, time to first token, generation speed, cache hit rate and
+how often outputs pass format validation, as a JSON report that can be
+compared across models and settings.
+"""
+
+import json
+import re
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from .controller import Controller
+from . import budget, prompts
+
+# Fixed inputs: change them and reports stop being comparable
+CORPUS = [
+    ("name", "a function that validates email addresses"),
+    ("name", "a class for user sessions"),
+    ("name", "maximum retry count constant"),
+    ("commit", "added user authentication with JWT tokens"),
+    ("commit", "fixed bug in login where empty passwords were accepted"),
+    ("commit", "updated readme with pipx install steps"),
+    ("pr", "feat(auth) -> add JWT authentication\n"
+           "fix(auth) -> reject empty passwords\n"
+           "docs(readme) -> document token refresh\n"
+           "test(auth) -> cover expired tokens"),
+    ("pr", "refactor(core) -> split controller handlers\n"
+           "feat(cli) -> add --stream option\n"
+           "perf(client) -> reuse pooled connections"),
+    ("squash", "feat(ui) -> add dashboard widgets\n"
+               "fix(ui) -> correct widget spacing\n"
+               "style(ui) -> align dashboard cards"),
+    ("squash", "docs(install) -> update setup instructions for venv\n"
+               "docs(install) -> mention pipx\n"
+               "chore(deps) -> bump requests"),
+    ("comment", "feat(formatter) -> standardize bullet points\n"
+                "refactor(git) -> restructure git commands\n"
+                "feat(cli) -> add terminal signature"),
+    ("comment", "fix(cache) -> evict least recently used entries first\n"
+                "perf(cache) -> skip eviction scan below the size limit"),
+    ("explain", "what is a closure in Python?"),
+    ("explain", "def memo(f):\n    cache = {}\n    def g(x):\n        if x not in cache:\n"
+                "            cache[x] = f(x)\n        return cache[x]\n    return g"),
+]
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_CONVENTIONAL = re.compile(r"^[a-z]+(\([^)\n]+\))? -> \S[^\n]*$")
+_MARKUP = re.compile(r"\*\*|__|^#+\s", re.MULTILINE)
+
+
+def _valid_pr(output: str) -> bool:
+    lines = [line for line in output.split("\n") if line.strip()]
+    return len(lines) >= 2 and not lines[0].startswith("- ") and all(line.startswith("- ") for line in lines[1:])
+
+
+def _valid_prose(output: str) -> bool:
+    return len(output.split()) >= 5 and not _MARKUP.search(output)
+
+
+# What a well-formed output looks like for each command
+FORMAT_CHECKS: dict[str, Callable[[str], bool]] = {
+    "name": lambda output: bool(_IDENTIFIER.match(output)),
+    "commit": lambda output: bool(_CONVENTIONAL.match(output)),
+    "squash": lambda output: bool(_CONVENTIONAL.match(output)),
+    "pr": _valid_pr,
+    "comment": _valid_prose,
+    "explain": _valid_prose,
+}
+
+
+def validate(command: str, output: str) -> bool:
+    """Check whether an output has the shape its command promises."""
+    check = FORMAT_CHECKS.get(command)
+    return bool(output) and (check is None or check(output))
+
+
+def percentile(values: list[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile (q in 0..100), None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def run_sample(controller: Controller, command: str, input_data: str, stream: bool = True) -> dict:
+    """Run one corpus entry and measure it (never raises)."""
+    sample = {"command": command, "latency_ms": None, "ttft_ms": None, "tokens": 0,
+              "cached": False, "valid": False, "error": None}
+    cache = getattr(controller.llm, "cache", None)
+    hits = cache.hits if cache else 0
+    start = time.perf_counter()
+    try:
+        output = controller.run(command, input_data, on_token=(lambda _: None) if stream else None)
+    except Exception as e:
+        sample["error"] = f"{type(e).__name__}: {e}"
+        return sample
+    elapsed = time.perf_counter() - start
+    ttft = controller.llm.last_ttft if stream else None
+
+    sample.update(
+        latency_ms=round(elapsed * 1000, 1),
+        ttft_ms=round(ttft * 1000, 1) if ttft is not None else None,
+        # Estimated the same way for every model, so throughput compares across tokenizers
+        tokens=budget.estimate_tokens(output),
+        cached=cache is not None and cache.hits > hits,
+        valid=validate(command, output),
+    )
+    return sample
+
+
+def summarize(samples: list[dict]) -> dict:
+    """Aggregate samples into latency percentiles, speed and validity share."""
+    ok = [s for s in samples if s["error"] is None]
+    latencies = [s["latency_ms"] for s in ok]
+    ttfts = [s["ttft_ms"] for s in ok if s["ttft_ms"] is not None]
+    # Throughput over everything generated after the first token; cache hits
+    # generate nothing, and one-word outputs are too short to time alone
+    generated = [s for s in ok if not s["cached"]]
+    tokens = sum(s["tokens"] for s in generated)
+    seconds = sum(s["latency_ms"] - (s["ttft_ms"] or 0) for s in generated) / 1000
+
+    def rounded(value):
+        return round(value, 1) if value is not None else None
+
+    return {
+        "samples": len(samples),
+        "errors": len(samples) - len(ok),
+        "p50_ms": rounded(percentile(latencies, 50)),
+        "p95_ms": rounded(percentile(latencies, 95)),
+        "ttft_p50_ms": rounded(percentile(ttfts, 50)),
+        "ttft_p95_ms": rounded(percentile(ttfts, 95)),
+        "tokens_per_s": round(tokens / seconds, 1) if seconds > 0 else None,
+        "valid_share": round(sum(s["valid"] for s in samples) / len(samples), 3) if samples else None,
+    }
+
+
+def run_bench(
+    controller: Controller,
+    corpus: Optional[list[tuple[str, str]]] = None,
+    runs: int = 1,
+    stream: bool = True,
+    on_sample: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Run the corpus through a controller and build a report.
+
+    Args:
+        controller: Controller wired to the model and settings under test
+        corpus: (command, input) pairs (default: CORPUS)
+        runs: How many times to run the whole corpus
+        stream: Stream responses, which is what makes TTFT measurable
+        on_sample: Called with each sample as it completes
+
+    Returns:
+        Report with model, settings, overall and per-command summaries and
+        every sample
+    """
+    from sinner import __version__
+
+    corpus = corpus or CORPUS
+    cache = getattr(controller.llm, "cache", None)
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+
+    samples = []
+    for run in range(runs):
+        for command, input_data in corpus:
+            sample = run_sample(controller, command, input_data, stream=stream)
+            sample["run"] = run + 1
+            samples.append(sample)
+            if on_sample:
+                on_sample(sample)
+
+    lookups = (cache.hits - hits) + (cache.misses - misses) if cache else 0
+    commands = {}
+    for command, _ in corpus:
+        if command not in commands:
+            commands[command] = summarize([s for s in samples if s["command"] == command])
+
+    return {
+        "sinner_version": __version__,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "model": controller.llm.model,
+        "base_url": controller.llm.base_url,
+        "settings": {
+            "runs": runs,
+            "stream": stream,
+            "cache": cache is not None,
+            "backends": [backend.url for backend in controller.llm.balancer.backends],
+            "balance": controller.llm.balancer.strategy,
+            "profiles": prompts.GENERATION_PROFILES,
+            "routes": {command: [f"{model}@{url}" if url else model for model, url in chain]
+                       for command, chain in controller.llm.routes.items()},
+        },
+        "summary": dict(
+            summarize(samples),
+            cache_hit_rate=round((cache.hits - hits) / lookups, 3) if lookups else 0.0,
+        ),
+        "commands": commands,
+        "samples": samples,
+    }
+
+
+def compare(baseline: dict, report: dict) -> list[tuple[str, Optional[float], Optional[float]]]:
+    """
+    Line up the overall metrics of two reports.
+
+    Returns:
+        (metric, baseline value, new value) for every summary metric
+    """
+    return [(metric, baseline.get("summary", {}).get(metric), value) for metric, value in report["summary"].items()]
+
+
+def write_report(report: dict, path: str):
+    """Write a report as indented JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write("\n")
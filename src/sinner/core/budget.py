@@ -0,0 +1,236 @@
+"""
+Fit prompts into the model's context window.
+Counts tokens (exactly when the server can tokenize, estimated otherwise)
+and trims the least valuable parts of a prompt until it fits, reporting
+what was left out.
+"""
+
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Union
+
+DEFAULT_CONTEXT_TOKENS = 4096
+
+# Chat template and role markers the prompt text doesn't show
+TEMPLATE_TOKENS = 32
+
+# A long commit is cut to its subject, capped at this many characters
+SUBJECT_CHARS = 200
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def chunk_commits(commits: list[str], budget: int) -> list[list[str]]:
+    """Split commits into consecutive chunks of at most `budget` estimated tokens"""
+    chunks: list[list[str]] = []
+    current: list[str] = []
+    used = 0
+    for commit in commits:
+        cost = estimate_tokens(commit) + 2
+        if current and used + cost > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(commit)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def context_limit(model: str) -> int:
+    """
+    Context window of a model, in tokens.
+
+    SINNER_CONTEXT_LIMITS maps models to limits ("qwen2.5-0.5b-instruct=32768,
+    gemma-3n-e4b=8192"); other models get SINNER_CONTEXT_TOKENS (default 4096).
+    """
+    for entry in os.getenv("SINNER_CONTEXT_LIMITS", "").split(","):
+        name, _, limit = entry.strip().rpartition("=")
+        if name.strip() == model and limit.strip().isdigit():
+            return int(limit)
+    return int(os.getenv("SINNER_CONTEXT_TOKENS", str(DEFAULT_CONTEXT_TOKENS)))
+
+
+class TokenCounter:
+    """
+    Token counts with a bounded cache.
+
+    count() asks tokenize (e.g. the server's /tokenize endpoint) for an exact
+    count and falls back to the estimate when it returns None. Exact counts
+    also calibrate estimate(), which stays cheap enough to call per commit.
+    """
+
+    def __init__(
+        self,
+        tokenize: Optional[Callable[[str], Optional[int]]] = None,
+        estimate: Callable[[str], int] = estimate_tokens,
+        max_entries: int = 2048,
+    ):
+        self.tokenize = tokenize
+        self._estimate = estimate
+        self.max_entries = max_entries
+        self.ratio = 1.0  # Exact / estimated, from the counts seen so far
+        self._counts: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        """Heuristic count, scaled by how far off it has been."""
+        return math.ceil(self._estimate(text) * self.ratio)
+
+    def count(self, text: str) -> int:
+        """Exact count when available, otherwise the estimate."""
+        with self._lock:
+            if text in self._counts:
+                self._counts.move_to_end(text)
+                return self._counts[text]
+        exact = self.tokenize(text) if self.tokenize else None
+        if exact is None:
+            return self.estimate(text)
+        with self._lock:
+            guess = self._estimate(text)
+            if guess >= 64:  # Short texts say little about the ratio
+                self.ratio = 0.7 * self.ratio + 0.3 * exact / guess
+            self._counts[text] = exact
+            if len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return exact
+
+
+class Fit:
+    """A prompt (system and user message) fitted to a token budget, and what was left out of it."""
+
+    def __init__(self, prompt: str, system: str, tokens: int, budget: int, dropped: list[str]):
+        self.prompt = prompt
+        self.system = system
+        self.tokens = tokens
+        self.budget = budget
+        self.dropped = dropped
+
+    @property
+    def over(self) -> bool:
+        """Still over budget: even the parts that can't be dropped don't fit."""
+        return self.tokens > self.budget
+
+
+def fit_prompt(
+    build: Callable[..., str],
+    subject: Union[list[str], str],
+    budget: int,
+    counter: TokenCounter,
+    unit: str = "commit",
+    system: str = "",
+    ranked: bool = False,
+) -> Fit:
+    """
+    Build a prompt that fits in budget tokens, least valuable parts first.
+
+    In order, until it fits: the few-shot examples, the system message
+    (the shared sinner intro), the bodies of long items (cut to their
+    subject line), the oldest items (lists are newest first), and for
+    free text its end. Ranked items (most important first, e.g. diff
+    hunks) are kept whole and the least important go first.
+
+    Args:
+        build: Prompt builder taking the subject and an examples flag
+        subject: Items (commits, hunks) or free text (a description, code)
+        budget: Tokens available for the prompt
+        counter: Token counter for the target model
+        unit: What an item is, for the report
+        system: System message sent along with the prompt
+        ranked: Items are ordered by importance rather than age
+
+    Returns:
+        The fitted prompt, its token count and what was dropped
+    """
+    options = {"examples": True}
+    dropped: list[str] = []
+
+    def measure(prompt: str) -> int:
+        estimate = counter.estimate(prompt) + (counter.estimate(system) if system else 0)
+        if estimate * 2 <= budget:
+            return estimate  # Fits even if the estimate is far off, skip the exact count
+        return counter.count(prompt) + (counter.count(system) if system else 0)
+
+    def done(prompt: str, tokens: int) -> Fit:
+        return Fit(prompt, system, tokens, budget, dropped)
+
+    prompt = build(subject, **options)
+    tokens = measure(prompt)
+    if tokens > budget:
+        options["examples"] = False
+        smaller = build(subject, **options)
+        if smaller != prompt:
+            dropped.append("few-shot examples")
+            prompt, tokens = smaller, measure(smaller)
+    if tokens > budget and system:
+        system = ""
+        dropped.append("sinner intro")
+        tokens = measure(prompt)
+    if tokens <= budget:
+        return done(prompt, tokens)
+
+    if isinstance(subject, str):
+        return _fit_text(build, subject, options, budget, counter, measure, done, dropped)
+
+    items = list(subject)
+    if not ranked:  # A ranked item (a hunk) says little without its body, keep it whole
+        items = [_subject_line(item) for item in subject]
+        cut = sum(1 for before, after in zip(subject, items) if before.strip() != after)
+        if cut:
+            dropped.append(f"all but the first line of {cut} long {unit}{'s' if cut != 1 else ''}")
+            prompt = build(items, **options)
+            tokens = measure(prompt)
+            if tokens <= budget:
+                return done(prompt, tokens)
+
+    # Keep as many of the newest items as the room left by the rest allows
+    room = budget - measure(build([], **options))
+    kept, used = 0, 0
+    for item in items:
+        used += counter.estimate(f"- {item}\n\n")
+        if used > room:
+            break
+        kept += 1
+    kept = max(kept, 1)
+    while True:
+        prompt = build(items[:kept], **options)
+        tokens = measure(prompt)
+        if tokens <= budget or kept == 1:
+            break
+        # Estimates were optimistic: shrink in proportion to the overshoot
+        kept = max(1, min(kept - 1, int(kept * budget / tokens)))
+    if kept < len(items):
+        left_out = len(items) - kept
+        which = "least important" if ranked else "oldest"
+        dropped.append(f"{left_out} {which} {unit}{'s' if left_out != 1 else ''}")
+    return done(prompt, tokens)
+
+
+def _fit_text(build, text: str, options: dict, budget: int, counter: TokenCounter, measure, done, dropped: list) -> Fit:
+    """Cut free text from the end until the prompt fits."""
+    room = budget - measure(build("", **options))
+    keep = len(text)
+    while True:
+        needed = counter.estimate(text[:keep])
+        if needed > room:
+            keep = max(0, int(keep * room / needed))
+        prompt = build(text[:keep] + "\n[...]", **options)
+        tokens = measure(prompt)
+        if tokens <= budget or keep == 0:
+            break
+        keep = int(keep * 0.9)  # Estimate was optimistic, each pass cuts at least 10%
+    dropped.append(f"last {len(text) - keep} characters of the input")
+    return done(prompt, tokens)
+
+
+def _subject_line(item: str) -> str:
+    """First line of an item, capped at SUBJECT_CHARS."""
+    line = item.strip().split("\n", 1)[0]
+    if len(line) > SUBJECT_CHARS:
+        line = line[:SUBJECT_CHARS].rstrip() + "…"
+    return line
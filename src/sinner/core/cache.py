@@ -0,0 +1,272 @@
+"""
+On-disk caches for LLM calls.
+Response cache: content-addressed, size-bounded LRU, safe across concurrent
+sinner processes. Summary store: condensed commit ranges keyed by SHA.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction runs unlocked, deletes already tolerate races
+    fcntl = None
+
+DEFAULT_CACHE_DIR = Path.home() / ".config" / "sinner" / "cache"
+DEFAULT_SUMMARY_DIR = Path.home() / ".config" / "sinner" / "summaries"
+
+# Writes between full scans of the cache directory, to notice other processes' entries
+RESCAN_EVERY = 256
+
+
+def _write_json(path: Path, record) -> bool:
+    """Atomically write JSON (temp file + rename). Returns False on failure."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        return False
+
+
+class ResponseCache:
+    """
+    Store LLM responses on disk, one JSON file per request.
+
+    Entries are named by a SHA-256 of the request (model, messages,
+    temperature and any other generation settings), so identical requests
+    share an entry. Writes are atomic (temp file + rename), reads touch the
+    file mtime to track recency, and eviction removes the least recently
+    used entries once the directory grows past max_bytes. The size is kept
+    as a running estimate, so a write only scans the directory when the
+    estimate crosses max_bytes or every RESCAN_EVERY writes.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.path = Path(path or os.getenv("SINNER_CACHE_DIR") or DEFAULT_CACHE_DIR).expanduser()
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("SINNER_CACHE_MAX_MB", "50")) * 1024 * 1024)
+        if ttl is None:
+            ttl = float(os.getenv("SINNER_CACHE_TTL", "0"))
+        self.max_bytes = max_bytes
+        self.ttl = ttl or None
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None  # Estimated bytes on disk, None until scanned
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(request: dict) -> str:
+        """Content address for a request body."""
+        body = {k: v for k, v in request.items() if k != "stream"}
+        data = json.dumps(body, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def get(self, request: dict) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            request: Chat completions request body
+
+        Returns:
+            Cached response text, or None on a miss or expired entry
+        """
+        entry = self._entry(self.key(request))
+        try:
+            with open(entry, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            if self.ttl and time.time() - record["created"] > self.ttl:
+                entry.unlink()
+                raise FileNotFoundError
+            os.utime(entry)  # Mark as recently used
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return record["response"]
+
+    def put(self, request: dict, response: str):
+        """
+        Store a response, then evict old entries if over the size limit.
+
+        Args:
+            request: Chat completions request body
+            response: Response text to cache
+        """
+        entry = self._entry(self.key(request))
+        record = {"created": time.time(), "model": request.get("model"), "response": response}
+        # A cache that can't be written is just a slower sinner
+        if _write_json(entry, record):
+            self._grow(entry)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process plus current disk usage."""
+        entries, size = 0, 0
+        for _, st in self._scan():
+            entries += 1
+            size += st.st_size
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        """Remove every cached entry."""
+        for entry, _ in self._scan():
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+
+    def _scan(self):
+        """Yield (path, stat) for every entry on disk."""
+        if not self.path.is_dir():
+            return
+        for bucket in os.scandir(self.path):
+            if not bucket.is_dir():
+                continue
+            for item in os.scandir(bucket.path):
+                if not item.name.endswith(".json"):
+                    continue
+                try:
+                    yield Path(item.path), item.stat()
+                except OSError:
+                    continue
+
+    def _grow(self, entry: Path):
+        """Add a written entry to the size estimate, evicting once it's over max_bytes."""
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            return
+        with self._lock:
+            self._writes += 1
+            if self._size is not None and self._writes % RESCAN_EVERY:
+                # Overwrites count twice: the estimate errs high, never lets the cache grow unchecked
+                self._size += size
+                if self._size <= self.max_bytes:
+                    return
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        entries = list(self._scan())
+        total = sum(st.st_size for _, st in entries)
+        self._size = total
+        if total <= self.max_bytes:
+            return
+
+        lock_file = None
+        try:
+            if fcntl is not None:
+                lock_file = open(self.path / ".lock", "w")
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return  # Another process is already evicting
+
+            # Evict down to 90% so every write doesn't trigger another scan
+            target = self.max_bytes * 0.9
+            for entry, st in sorted(entries, key=lambda e: e[1].st_mtime):
+                if total <= target:
+                    break
+                try:
+                    entry.unlink()
+                except OSError:
+                    pass
+                total -= st.st_size
+            self._size = total
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+
+
+class SummaryStore:
+    """
+    Condensed summaries of commit ranges, keyed by their SHA boundaries.
+
+    A range is identified by its oldest and newest commit. When a branch
+    gains commits, the stored summary of the older part is reused and only
+    the new commits need summarizing. One file per (model, oldest SHA)
+    holds every known newest SHA for that starting point.
+
+    Only ranges with the same oldest commit match, e.g. a branch since its
+    fork point. A window of the last N commits starts later every time the
+    branch grows, and a stored summary would bring back commits the window
+    has dropped, so sliding windows (--count) are summarized from scratch.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or os.getenv("SINNER_SUMMARY_DIR") or DEFAULT_SUMMARY_DIR).expanduser()
+
+    def _file(self, model: str, oldest: str) -> Path:
+        digest = hashlib.sha256(f"{model}\n{oldest}".encode("utf-8")).hexdigest()
+        return self.path / f"{digest}.json"
+
+    def _load(self, model: str, oldest: str) -> dict:
+        try:
+            with open(self._file(model, oldest), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, model: str, shas: list[str]) -> Optional[tuple[int, list[str]]]:
+        """
+        Find the longest stored summary covering the oldest part of a range,
+        starting at its oldest commit.
+
+        Args:
+            model: Model that produced the summary
+            shas: Commit SHAs of the range, newest first
+
+        Returns:
+            (number of new commits not covered, summary lines), or None
+        """
+        if not shas:
+            return None
+        ranges = self._load(model, shas[-1])
+        for new_count, sha in enumerate(shas):
+            if sha in ranges:
+                return new_count, ranges[sha]
+        return None
+
+    def store(self, model: str, shas: list[str], lines: list[str]):
+        """
+        Remember the summary of a range.
+
+        Args:
+            model: Model that produced the summary
+            shas: Commit SHAs of the range, newest first
+            lines: Condensed summary lines
+        """
+        if not shas:
+            return
+        # Read-modify-write can lose a concurrent entry; that only costs a re-summarize
+        ranges = self._load(model, shas[-1])
+        ranges[shas[0]] = lines
+        _write_json(self._file(model, shas[-1]), ranges)
@@ -3,10 +3,21 @@ Agent controller - the mother.
 Explicit command routing. No LLM intent detection.
 """
 
-from typing import Optional
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
+from functools import partial
+from typing import Callable, Optional
 from .llm_client import LLMClient
-from . import prompts
-from ..utils.formatter import OutputFormatter
+from .async_client import AsyncLLMClient
+from .cache import SummaryStore
+from . import budget, prompts
+from ..utils.formatter import OutputFormatter, StreamFormatter
+from ..utils import metrics
+
+# Where to tell the user about the current run, e.g. a trimmed prompt
+_on_notice: ContextVar[Optional[Callable[[str], None]]] = ContextVar("sinner_on_notice", default=None)
 
 
 class Controller:
@@ -15,18 +26,55 @@ class Controller:
     The LLM never decides intent - we do.
     """
 
-    def __init__(self, llm_client: Optional[LLMClient] = None):
+    MAX_REDUCE_LEVELS = 4
+
+    def __init__(
+        self,
+        llm_client: Optional[LLMClient] = None,
+        async_client: Optional[AsyncLLMClient] = None,
+        chunk_tokens: Optional[int] = None,
+        fanout: Optional[int] = None,
+    ):
         self.llm = llm_client or LLMClient()
         self.formatter = OutputFormatter()
+        self._async_llm = async_client
+        # Commit ranges above chunk_tokens are summarized map-reduce style
+        self.chunk_tokens = chunk_tokens or int(os.getenv("SINNER_CHUNK_TOKENS", "1500"))
+        self.fanout = fanout or int(os.getenv("SINNER_FANOUT", "4"))
+        # Range summaries are a cache too, so --no-cache skips them
+        self.summaries = SummaryStore() if getattr(self.llm, "cache", None) is not None else None
+        # Opt-in local log of per-invocation timings (SINNER_METRICS)
+        self.metrics_log = metrics.log_path()
+
+    @property
+    def async_llm(self) -> AsyncLLMClient:
+        """Async client sharing this controller's LLMClient, created on first use."""
+        if self._async_llm is None:
+            self._async_llm = AsyncLLMClient(self.llm)
+        return self._async_llm
 
-    def run(self, command: str, input_data: str, **flags) -> str:
+    def run(
+        self,
+        command: str,
+        input_data: str,
+        on_token: Optional[Callable[[str], None]] = None,
+        on_notice: Optional[Callable[[str], None]] = None,
+        **flags,
+    ) -> str:
         """
         Execute a command with explicit routing.
         
         Args:
             command: The command to execute (name, commit, comment, pr, squash, explain)
             input_data: The input data for the command
-            **flags: Additional flags (currently unused, kept for compatibility)
+            on_token: Optional callback to stream cleaned output as it is generated
+            on_notice: Optional callback for notes about the run, such as
+                parts of the input that didn't fit in the model's context
+            **flags: Additional flags. shas: commit SHAs matching the input
+                lines (newest first) lets pr, squash and comment reuse
+                summaries of ranges seen before. hunks and files: staged
+                diff hunks (most important first) and file overview make
+                commit describe the diff, input_data being an optional note
             
         Returns:
             The result of the command execution
@@ -35,60 +83,278 @@ class Controller:
             ValueError: If command is not supported
         """
         command = command.lower().strip()
+        notice_token = _on_notice.set(on_notice)
+        try:
+            return self._run(command, input_data, on_token, flags)
+        finally:
+            _on_notice.reset(notice_token)
+
+    def _run(self, command: str, input_data: str, on_token, flags: dict) -> str:
+        """Route a command, profiling and logging it when metrics are on."""
+        if self.metrics_log is None and metrics.current() is None:
+            return self._route(command, input_data, on_token, flags)
+        
+        with metrics.profiling(metrics.current()) as profile:
+            start = time.perf_counter()
+            error = None
+            try:
+                with metrics.span("command"):
+                    return self._route(command, input_data, on_token, flags)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                if self.metrics_log is not None:
+                    self._log_invocation(command, profile, time.perf_counter() - start, on_token is not None, error)
+
+    def _route(self, command: str, input_data: str, on_token, flags: dict) -> str:
+        """Dispatch a normalized command to its handler."""
+        shas = flags.get("shas")
         
         if command == "name":
-            return self._handle_name(input_data)
+            return self._handle_name(input_data, on_token)
         elif command == "commit":
-            return self._handle_commit(input_data)
+            return self._handle_commit(input_data, on_token, flags.get("hunks"), flags.get("files", ""))
         elif command == "comment":
-            return self._handle_comment(input_data)
+            return self._handle_comment(input_data, on_token, shas)
         elif command == "pr":
-            return self._handle_pr(input_data)
+            return self._handle_pr(input_data, on_token, shas)
         elif command == "squash":
-            return self._handle_squash(input_data)
+            return self._handle_squash(input_data, on_token, shas)
         elif command == "explain":
-            return self._handle_explain(input_data)
+            return self._handle_explain(input_data, on_token)
         else:
             raise ValueError(
                 f"Unsupported command: '{command}'. "
                 f"Supported commands: name, commit, comment, pr, squash, explain"
             )
 
-    def _handle_name(self, context: str) -> str:
+    def _log_invocation(self, command: str, profile: metrics.Profile, elapsed: float, stream: bool, error):
+        """Append this invocation's timings and counters to the metrics log."""
+        timings = profile.timings()
+        counters = profile.counters
+        metrics.log_invocation(self.metrics_log, {
+            "command": command,
+            "model": self.llm.targets(command)[0].model,
+            "stream": stream,
+            "latency_ms": round(elapsed * 1000, 1),
+            "ttft_ms": timings.get("llm.first_token"),
+            "llm_calls": counters.get("llm_calls", 0),
+            "prompt_tokens": counters.get("prompt_tokens", 0),
+            "completion_tokens": counters.get("completion_tokens", 0),
+            "cache_hits": counters.get("cache_hits", 0),
+            "cache_misses": counters.get("cache_misses", 0),
+            "prompts_trimmed": counters.get("prompts_trimmed", 0),
+            "error": error,
+            "spans": timings,
+        })
+
+    async def run_async(
+        self,
+        command: str,
+        input_data: str,
+        on_token: Optional[Callable[[str], None]] = None,
+        on_notice: Optional[Callable[[str], None]] = None,
+        **flags,
+    ) -> str:
+        """
+        Async version of run().
+        
+        Commands started together run concurrently, up to the async client's
+        concurrency limit; the rest wait for a free slot. on_token is called
+        from a worker thread.
+        
+        Args:
+            command: The command to execute (name, commit, comment, pr, squash, explain)
+            input_data: The input data for the command
+            on_token: Optional callback to stream cleaned output as it is generated
+            on_notice: Optional callback for notes about the run
+            **flags: Additional flags passed through to run()
+            
+        Returns:
+            The result of the command execution
+            
+        Raises:
+            ValueError: If command is not supported
+        """
+        return await self.async_llm.run_blocking(partial(self.run, command, input_data, on_token, on_notice, **flags))
+
+    def _handle_name(self, context: str, on_token=None) -> str:
         """Generate a name suggestion."""
-        prompt = prompts.prompt_name(context)
-        result = self.llm.ask(prompt, temperature=0.7)
-        return self.formatter.clean_output(result)
+        with metrics.span("prompt"):
+            fit = self._prompt("name", prompts.prompt_name, context)
+        return self._ask_formatted(fit, "name", on_token)
 
-    def _handle_commit(self, changes: str) -> str:
-        """Generate a commit message."""
-        prompt = prompts.prompt_commit(changes)
-        result = self.llm.ask(prompt, temperature=0.5)
-        return self.formatter.clean_output(result)
+    def _handle_commit(self, changes: str, on_token=None, hunks=None, files: str = "") -> str:
+        """Generate a commit message, from staged hunks (most important first) when given."""
+        with metrics.span("prompt"):
+            if hunks is not None:
+                build = partial(prompts.prompt_commit_diff, files=files, description=changes)
+                fit = self._prompt("commit", build, hunks, unit="hunk", ranked=True)
+            else:
+                fit = self._prompt("commit", prompts.prompt_commit, changes)
+        return self._ask_formatted(fit, "commit", on_token)
 
-    def _handle_comment(self, commits_or_data: str) -> str:
+    def _handle_comment(self, commits_or_data: str, on_token=None, shas=None) -> str:
         """Generate informal, detailed summary of recent changes."""
         commits = commits_or_data.split("\n") if commits_or_data else []
-        prompt = prompts.prompt_comment(commits)
-        result = self.llm.ask(prompt, temperature=0.7)
-        return self.formatter.clean_output(result)
+        with metrics.span("prompt"):
+            fit = self._prompt("comment", prompts.prompt_comment, self._fit_commits(commits, shas))
+        return self._ask_formatted(fit, "comment", on_token)
 
-    def _handle_pr(self, commits_or_data: str) -> str:
+    def _handle_pr(self, commits_or_data: str, on_token=None, shas=None) -> str:
         """Generate formal PR description (title + bullets)."""
         commits = commits_or_data.split("\n") if commits_or_data else []
-        prompt = prompts.prompt_comment_pr(commits)
-        result = self.llm.ask(prompt, temperature=0.6)
-        return self.formatter.format_pr_comment(result)
+        with metrics.span("prompt"):
+            fit = self._prompt("pr", prompts.prompt_comment_pr, self._fit_commits(commits, shas))
+        return self._ask_formatted(fit, "pr", on_token, pr_layout=True)
 
-    def _handle_squash(self, commits_or_data: str) -> str:
+    def _handle_squash(self, commits_or_data: str, on_token=None, shas=None) -> str:
         """Generate single commit message for squash merge."""
         commits = commits_or_data.split("\n") if commits_or_data else []
-        prompt = prompts.prompt_comment_squash(commits)
-        result = self.llm.ask(prompt, temperature=0.5)
-        return self.formatter.clean_output(result)
+        with metrics.span("prompt"):
+            fit = self._prompt("squash", prompts.prompt_comment_squash, self._fit_commits(commits, shas))
+        return self._ask_formatted(fit, "squash", on_token)
 
-    def _handle_explain(self, content: str) -> str:
+    def _handle_explain(self, content: str, on_token=None) -> str:
         """Explain code or concepts."""
-        prompt = prompts.prompt_explain(content)
-        result = self.llm.ask(prompt, temperature=0.7)
-        return self.formatter.clean_output(result)
+        with metrics.span("prompt"):
+            fit = self._prompt("explain", prompts.prompt_explain, content)
+        return self._ask_formatted(fit, "explain", on_token)
+
+    def _fit_commits(self, commits: list[str], shas: Optional[list[str]] = None) -> list[str]:
+        """
+        Shrink a commit list until it fits in one chunk (map-reduce).
+        
+        Small ranges pass through untouched. For larger ones with known
+        SHAs, a stored summary of the older part of the range is reused so
+        only the newer commits are summarized; the result is stored again
+        under the new range boundaries.
+        """
+        if budget.estimate_tokens("\n".join(commits)) <= self.chunk_tokens:
+            return commits
+        if not self.summaries or not shas or len(shas) != len(commits):
+            return self._reduce_commits(commits)
+        
+        # Chunk summaries come from the summarize route, not from MODEL_ID
+        model = self.llm.targets("summarize")[0].model
+        hit = self.summaries.lookup(model, shas)
+        if hit:
+            new_count, lines = hit
+            if new_count == 0:
+                return lines
+            # Newest first: fresh commits, then the summary of the known range
+            commits = commits[:new_count] + lines
+        fitted = self._reduce_commits(commits)
+        self.summaries.store(model, shas, fitted)
+        return fitted
+
+    def _reduce_commits(self, commits: list[str]) -> list[str]:
+        """
+        Condense commits level by level until they fit in one chunk.
+        
+        Commits are split into chunks of chunk_tokens, each chunk is
+        condensed in parallel (up to fanout at once), and the condensed
+        lines replace the commits. The final prompt then reduces the
+        partial summaries instead of the raw history.
+        """
+        for _ in range(self.MAX_REDUCE_LEVELS):
+            if budget.estimate_tokens("\n".join(commits)) <= self.chunk_tokens:
+                break
+            chunks = budget.chunk_commits(commits, self.chunk_tokens)
+            # Workers record into this invocation's profile, if any
+            contexts = [copy_context() for _ in chunks]
+            with ThreadPoolExecutor(max_workers=self.fanout) as pool:
+                partials = list(pool.map(lambda ctx, chunk: ctx.run(self._summarize_chunk, chunk), contexts, chunks))
+            condensed = [line for summary in partials for line in summary]
+            if len(condensed) >= len(commits):
+                # Chunk summaries are not getting shorter, keep one line per chunk
+                condensed = [" ".join(summary) for summary in partials]
+            commits = condensed
+            if len(commits) == 1:
+                break
+        return commits
+
+    def _summarize_chunk(self, commits: list[str]) -> list[str]:
+        """Condense one chunk of commits into a few summary lines."""
+        with metrics.span("summarize"):
+            fit = self._prompt("summarize", prompts.prompt_summarize_chunk, commits)
+            result = self.llm.ask(
+                fit.prompt,
+                system=fit.system,
+                command="summarize",
+                **prompts.generation_profile("summarize"),
+            )
+        lines = [line.lstrip("-*• ").strip() for line in self.formatter.clean_output(result).split("\n")]
+        return [line for line in lines if line] or commits[:1]
+
+    def _prompt(
+        self, command: str, build: Callable[..., str], subject, unit: str = "commit", ranked: bool = False
+    ) -> budget.Fit:
+        """
+        Build a command's prompt within the context window of the model it
+        is routed to, leaving out the least valuable parts if it doesn't fit.
+        
+        Args:
+            command: Command whose model and generation profile apply
+            build: Prompt builder from prompts
+            subject: Commits (newest first) or the command's text input
+            unit: What an item of subject is, for the notice
+            ranked: Items are ordered by importance (diff hunks), not age
+            
+        Returns:
+            The prompt and system message; if anything was left out,
+            on_notice is told what
+        """
+        model = self.llm.targets(command)[0].model
+        limit = budget.context_limit(model)
+        # Room for the answer and the chat template comes off the top
+        reserved = (prompts.generation_profile(command).get("max_tokens") or 0) + budget.TEMPLATE_TOKENS
+        fit = budget.fit_prompt(
+            build,
+            subject,
+            limit - reserved,
+            self.llm.counter_for(model),
+            unit=unit,
+            system=prompts.SYSTEM_PROMPT,
+            ranked=ranked,
+        )
+        if fit.dropped:
+            metrics.count("prompts_trimmed")
+            notice = _on_notice.get()
+            if notice is not None:
+                over = " (still over, expect the server to truncate)" if fit.over else ""
+                notice(f"{command} prompt trimmed to fit {model}'s {limit}-token context{over}: "
+                       f"left out {', '.join(fit.dropped)}")
+        return fit
+
+    def _ask_formatted(self, fit: budget.Fit, command: str, on_token=None, pr_layout: bool = False) -> str:
+        """
+        Ask the LLM with the command's generation profile and route and
+        format the result, streaming it when on_token is set.
+        """
+        profile = prompts.generation_profile(command)
+        if on_token is None:
+            result = self.llm.ask(fit.prompt, system=fit.system, command=command, **profile)
+            with metrics.span("format"):
+                if pr_layout:
+                    return self.formatter.format_pr_comment(result)
+                return self.formatter.clean_output(result)
+        
+        stream = StreamFormatter(pr_layout=pr_layout)
+        pieces = []
+        formatting = 0.0  # Formatter time is interleaved with generation, sum it up
+        for chunk in self.llm.ask_stream(fit.prompt, system=fit.system, command=command, **profile):
+            start = time.perf_counter()
+            text = stream.feed(chunk)
+            formatting += time.perf_counter() - start
+            if text:
+                pieces.append(text)
+                on_token(text)
+        start = time.perf_counter()
+        text = stream.finish()
+        metrics.record("format", formatting + time.perf_counter() - start)
+        if text:
+            pieces.append(text)
+            on_token(text)
+        return "".join(pieces)
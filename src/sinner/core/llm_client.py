@@ -1,54 +1,711 @@
+import itertools
+import json
 import os
-from pathlib import Path
+import queue
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import copy_context
+from typing import Iterator, Optional
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from .balancer import Backend, Balancer
+from .budget import TokenCounter, estimate_tokens
+from .cache import ResponseCache
+from .resilience import RETRYABLE, CircuitBreaker, RetryPolicy, classify_error, retry_after
+from .routing import ROUTED_COMMANDS, Target, routes_from_env
+from ..utils import metrics
+from ..utils.config import load_config
 
-# Load from global config directory
-config_dir = Path.home() / ".config" / "sinner"
-env_file = config_dir / ".env"
-if env_file.exists():
-    load_dotenv(env_file)
-else:
-    # Fallback to local .env for development/testing
-    load_dotenv()
+# Anything that builds a client needs the settings
+load_config()
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Read a boolean setting from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
 
 
 class LLMClient:
     """
     Isolated LLM client for interacting with LM Studio.
     Handles all direct API communication.
+
+    The client owns one pooled keep-alive HTTP session, so repeated calls
+    reuse open connections instead of paying TCP setup every time. A single
+    instance is safe to share across threads.
+
+    Responses are served from the on-disk ResponseCache when the same request
+    was answered before (disable with use_cache=False or SINNER_CACHE=0).
+
+    With several servers in LMSTUDIO_BASE_URLS, each request goes to the
+    backend the Balancer picks (SINNER_BALANCE strategy).
+
+    Connection errors, timeouts and 5xx/429 responses are retried with
+    jittered exponential backoff, on another backend when there is one.
+    After repeated failures a circuit breaker makes requests fail fast
+    with CircuitOpenError until the server has had time to recover.
+
+    With hedging on (SINNER_HEDGE=1) and more than one backend, a request
+    that has not produced its first token within the SINNER_HEDGE_PERCENTILE
+    of recent first-token times is duplicated on another backend; the first
+    to answer wins and the other is cancelled. The window of first-token
+    times lives in memory, so hedging only starts in a process that makes
+    SINNER_HEDGE_MIN_SAMPLES requests (the daemon, batch, bench).
+
+    Commands can be routed to their own model and server with a fallback
+    chain (SINNER_ROUTE_<COMMAND>, see targets()); MODEL_ID on the default
+    backends is the last resort.
     """
 
-    def __init__(self):
-        self.base_url = os.getenv("LMSTUDIO_BASE_URL", "http://127.0.0.1:1234/v1").rstrip("/")
+    def __init__(
+        self,
+        pool_size: Optional[int] = None,
+        keep_alive: Optional[bool] = None,
+        use_cache: Optional[bool] = None,
+        cache: Optional[ResponseCache] = None,
+        balancer: Optional[Balancer] = None,
+    ):
+        self.balancer = balancer or Balancer.from_env(os.getenv("LMSTUDIO_BASE_URL", "http://127.0.0.1:1234/v1"))
+        self.base_url = self.balancer.backends[0].url
         self.api_key = os.getenv("LMSTUDIO_API_KEY", "lm-studio")
         self.model = os.getenv("MODEL_ID", "google/gemma-3n-e4b")
         self.headers = {"Authorization": f"Bearer {self.api_key}"}
+        # Connect fails fast; read is generous since cold model loads are slow
+        self.timeout = (
+            float(os.getenv("SINNER_CONNECT_TIMEOUT", "3.05")),
+            float(os.getenv("SINNER_READ_TIMEOUT", "120")),
+        )
+        self.retry = RetryPolicy(
+            retries=int(os.getenv("SINNER_RETRIES", "2")),
+            base=float(os.getenv("SINNER_BACKOFF", "0.5")),
+            cap=float(os.getenv("SINNER_BACKOFF_MAX", "8")),
+        )
+        self.breaker = CircuitBreaker(
+            threshold=int(os.getenv("SINNER_BREAKER_THRESHOLD", "5")),
+            cooldown=float(os.getenv("SINNER_BREAKER_COOLDOWN", "15")),
+        )
+        self.hedge = _env_flag("SINNER_HEDGE", False)
+        self.hedge_percentile = float(os.getenv("SINNER_HEDGE_PERCENTILE", "95"))
+        self.hedge_min_samples = int(os.getenv("SINNER_HEDGE_MIN_SAMPLES", "20"))
+        # Recent first-token times per model, to know when to hedge
+        self._first_token_times: dict[str, deque] = defaultdict(lambda: deque(maxlen=200))
+        self.routes = routes_from_env()
+        self._pools: dict[str, tuple[Balancer, CircuitBreaker]] = {}
+        self._pools_lock = threading.Lock()
+        # Exact prompt token counts when the server can tokenize (llama.cpp, vLLM)
+        self.tokenizer = os.getenv("SINNER_TOKENIZER", "auto").strip().lower()
+        self._can_tokenize: Optional[bool] = False if self.tokenizer == "estimate" else None
+        self.tokens = TokenCounter(self.tokenize)
+        self._estimates = TokenCounter()
+        # Prompt prefix caching on llama.cpp servers: auto, on or off
+        self.prompt_cache = os.getenv("SINNER_PROMPT_CACHE", "auto").strip().lower()
+        self.slots = int(os.getenv("SINNER_SLOTS", "0"))  # 0: ask the server
+        self._props: Optional[dict] = None
+        self._in_flight = 0  # Requests running on this client, across threads
+        self._in_flight_lock = threading.Lock()
+        self.pool_size = pool_size or int(os.getenv("SINNER_POOL_SIZE", "4"))
+        self.keep_alive = _env_flag("SINNER_KEEP_ALIVE", True) if keep_alive is None else keep_alive
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+        self.last_ttft: Optional[float] = None
+        if use_cache is None:
+            use_cache = _env_flag("SINNER_CACHE", True)
+        self.cache = (cache or ResponseCache()) if use_cache else None
+
+    @property
+    def session(self) -> requests.Session:
+        """Shared HTTP session, created on first use."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
 
-    def ask(self, prompt: str, temperature: float = 0.7) -> str:
+    def _build_session(self) -> requests.Session:
+        """
+        Build a session backed by a bounded connection pool.
+
+        pool_block makes extra threads wait for a free connection instead of
+        opening throwaway ones, so the pool size is a hard cap.
+        """
+        session = requests.Session()
+        # One pool per server, so switching backends doesn't evict open connections
+        hosts = {b.url for b in self.balancer.backends}
+        hosts.update(url for chain in self.routes.values() for _, url in chain if url)
+        adapter = HTTPAdapter(pool_connections=len(hosts), pool_maxsize=self.pool_size, pool_block=True)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(self.headers)
+        session.headers["Connection"] = "keep-alive" if self.keep_alive else "close"
+        return session
+
+    def close(self):
+        """Close pooled connections."""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ask(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        stop: Optional[list[str]] = None,
+        command: Optional[str] = None,
+        system: Optional[str] = None,
+    ) -> str:
         """
         Send a prompt to the LLM and return the response.
         
         Args:
             prompt: The prompt to send
             temperature: The temperature for generation (default: 0.7)
+            max_tokens: Optional cap on generated tokens
+            stop: Optional stop sequences
+            command: Optional command whose route picks the model and server
+            system: Optional system message, sent ahead of the prompt
             
         Returns:
             The LLM's response as a string
             
         Raises:
             requests.exceptions.HTTPError: If the API request fails
+            requests.exceptions.RequestException: If the server stays
+                unreachable after retries (CircuitOpenError when failing fast)
         """
+        targets = self.targets(command)
+        payload = self._payload(prompt, temperature, targets[0].model, max_tokens=max_tokens, stop=stop, system=system)
+        cached = self._cached(payload)
+        if cached is not None:
+            return cached.strip()
+        
+        with self._request():
+            for i, target in enumerate(targets):
+                payload["model"] = target.model
+                try:
+                    content = self._complete(dict(payload, **self._server_options(target, command)), prompt, target)
+                    break
+                except requests.RequestException:
+                    if i == len(targets) - 1:
+                        raise
+                    metrics.count("llm_fallbacks")
+        if self.cache:
+            self.cache.put(payload, content)
+        return content.strip()
+
+    def _complete(self, payload: dict, prompt: str, target: Target) -> str:
+        """Get one non-streamed completion from a target, with retries."""
+        if self.hedge and len(target.balancer.backends) > 1:
+            # Hedging needs to see first tokens, also to learn their times before it starts
+            with metrics.span("llm.request"):
+                content = "".join(self._generate(dict(payload, stream=True), target))
+            self._count_tokens(prompt, content)
+            return content
+        
+        tried = []
+        with metrics.span("llm.request"):
+            for attempt in itertools.count():
+                try:
+                    backend, resp, start = self._post(payload, tried, target)
+                except requests.RequestException as e:
+                    if self._retry_wait(e, attempt):
+                        continue
+                    raise
+                self._finish(target, backend, start)
+                break
+        body = resp.json()
+        content = body["choices"][0]["message"]["content"]
+        self._count_tokens(prompt, content, body.get("usage"))
+        return content
+
+    def ask_stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        stop: Optional[list[str]] = None,
+        command: Optional[str] = None,
+        system: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Send a prompt and yield response text as the server generates it.
+        
+        Uses server-sent events (stream: true). Time from request to the
+        first non-empty token is stored in last_ttft (seconds). A cache hit
+        is replayed as a single chunk.
+        
+        Args:
+            prompt: The prompt to send
+            temperature: The temperature for generation (default: 0.7)
+            max_tokens: Optional cap on generated tokens
+            stop: Optional stop sequences
+            command: Optional command whose route picks the model and server
+            system: Optional system message, sent ahead of the prompt
+            
+        Yields:
+            Content deltas in arrival order
+            
+        Raises:
+            requests.exceptions.HTTPError: If the API request fails
+            requests.exceptions.RequestException: If the server stays
+                unreachable after retries, or the stream breaks after
+                tokens were yielded (those can't be retried)
+        """
+        self.last_ttft = None
+        start = time.perf_counter()
+        targets = self.targets(command)
+        payload = self._payload(
+            prompt, temperature, targets[0].model, max_tokens=max_tokens, stop=stop, system=system, stream=True
+        )
+        cached = self._cached(payload)
+        if cached is not None:
+            self.last_ttft = time.perf_counter() - start
+            yield cached
+            return
+        
+        chunks = []
+        with self._request():
+            for i, target in enumerate(targets):
+                payload["model"] = target.model
+                try:
+                    for delta in self._generate(dict(payload, **self._server_options(target, command)), target):
+                        if self.last_ttft is None:
+                            self.last_ttft = time.perf_counter() - start
+                            # Round trip plus prompt processing; the rest is generation
+                            metrics.record("llm.first_token", self.last_ttft)
+                        chunks.append(delta)
+                        yield delta
+                    break
+                except requests.RequestException:
+                    # Text already shown can't be taken back by switching models
+                    if chunks or i == len(targets) - 1:
+                        raise
+                    metrics.count("llm_fallbacks")
+        if self.last_ttft is not None:
+            metrics.record("llm.generate", time.perf_counter() - start - self.last_ttft)
+        content = "".join(chunks)
+        self._count_tokens(prompt, content)
+        # Only complete responses are cached
+        if self.cache:
+            self.cache.put(payload, content)
+
+    def targets(self, command: Optional[str] = None) -> list[Target]:
+        """
+        Models and servers to try for a command, in fallback order.
+        
+        The chain comes from SINNER_ROUTE_<COMMAND> (e.g. SINNER_ROUTE_NAME=
+        "qwen2.5-0.5b-instruct@http://10.0.0.7:1234/v1, llama-3.2-3b-instruct").
+        Entries without a URL use the default backends. MODEL_ID on the
+        default backends always ends the chain.
+        """
+        chain = []
+        for model, url in self.routes.get(command, ()):
+            balancer, breaker = self._pool(url) if url else (self.balancer, self.breaker)
+            chain.append(Target(model, balancer, breaker))
+        if not any(t.model == self.model and t.balancer is self.balancer for t in chain):
+            chain.append(Target(self.model, self.balancer, self.breaker))
+        return chain
+
+    def counter_for(self, model: str) -> TokenCounter:
+        """Token counter for a model: exact for MODEL_ID, estimated for routed ones."""
+        return self.tokens if model == self.model else self._estimates
+
+    def tokenize(self, text: str) -> Optional[int]:
+        """
+        Count the tokens of text with MODEL_ID's tokenizer on the server.
+        
+        Uses the /tokenize endpoint of llama.cpp and vLLM servers. With
+        SINNER_TOKENIZER=auto (the default), a server without one is not
+        asked again.
+        
+        Returns:
+            Token count, or None when the server can't tell
+        """
+        if self._can_tokenize is False:
+            return None
+        try:
+            resp = self.session.post(
+                f"{self._server_root()}/tokenize",
+                # llama.cpp reads content, vLLM reads prompt and model
+                json={"content": text, "prompt": text, "model": self.model, "add_special": False},
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+            body = resp.json()
+            count = body["count"] if "count" in body else len(body["tokens"])
+        except (requests.RequestException, ValueError, KeyError, TypeError):
+            if self._can_tokenize is None and self.tokenizer == "auto":
+                self._can_tokenize = False
+            return None
+        self._can_tokenize = True
+        return count
+
+    def _server_options(self, target: Target, command: Optional[str]) -> dict:
+        """
+        Extra request fields for llama.cpp servers, so the prompt prefix
+        stays in the server's KV cache.
+        
+        cache_prompt reuses the part of the prompt a slot has already
+        processed. With several slots, id_slot pins each command to its own
+        slot, so its instructions stay cached between runs. Only a request
+        running alone is pinned: a pinned slot serves one request at a time,
+        so concurrent ones (batch, async, daemon, map-reduce chunks) are
+        left to the server rather than queued behind it. Sent only to the
+        default servers, and only when they are llama.cpp (auto) or
+        SINNER_PROMPT_CACHE=on says so; other servers may reject unknown fields.
+        """
+        if self.prompt_cache == "off" or target.balancer is not self.balancer:
+            return {}
+        slots = self.slots
+        if self.prompt_cache == "auto":
+            props = self._server_props()
+            if props is None:
+                return {}
+            slots = slots or props.get("total_slots") or 0
+        options = {"cache_prompt": True}
+        if slots > 1 and self._in_flight <= 1 and command in ROUTED_COMMANDS and command != "summarize":
+            options["id_slot"] = ROUTED_COMMANDS.index(command) % slots
+        return options
+
+    @contextmanager
+    def _request(self):
+        """Count a request as in flight while it runs."""
+        with self._in_flight_lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._in_flight_lock:
+                self._in_flight -= 1
+
+    def _server_props(self) -> Optional[dict]:
+        """llama.cpp's /props (slot count, context size), or None for other servers. Asked once."""
+        if self._props is None:
+            props = {}
+            try:
+                resp = self.session.get(f"{self._server_root()}/props", timeout=self.timeout)
+                if resp.ok:
+                    body = resp.json()
+                    if isinstance(body, dict) and "total_slots" in body:
+                        props = body
+            except (requests.RequestException, ValueError):
+                pass
+            self._props = props
+        return self._props or None
+
+    def _server_root(self) -> str:
+        """Server URL without the /v1 of the OpenAI-compatible API."""
+        return self.base_url[:-3] if self.base_url.endswith("/v1") else self.base_url
+
+    def _pool(self, url: str) -> tuple[Balancer, CircuitBreaker]:
+        """Balancer and circuit breaker for a routed server, created on first use."""
+        url = url.rstrip("/")
+        if url in {b.url for b in self.balancer.backends}:
+            return self.balancer, self.breaker
+        with self._pools_lock:
+            if url not in self._pools:
+                self._pools[url] = (
+                    Balancer([url], strategy=self.balancer.strategy),
+                    CircuitBreaker(self.breaker.threshold, self.breaker.cooldown),
+                )
+            return self._pools[url]
+
+    def _generate(self, payload: dict, target: Target) -> Iterator[str]:
+        """Stream a request's content deltas, hedged when it makes sense."""
+        delay = self._hedge_delay(target)
+        if delay is None:
+            return self._stream(payload, [], target)
+        return self._hedged(payload, target, delay)
+
+    def _stream(self, payload: dict, tried: list, target: Target, leg: Optional["_Leg"] = None) -> Iterator[str]:
+        """
+        Stream content deltas, retrying attempts that fail before their
+        first token. A cancelled hedge leg stops quietly.
+        """
+        for attempt in itertools.count():
+            if leg is not None and leg.cancelled.is_set():
+                return
+            try:
+                backend, resp, request_start = self._post(payload, tried, target, stream=True)
+            except requests.RequestException as e:
+                if self._retry_wait(e, attempt):
+                    continue
+                raise
+            if leg is not None:
+                leg.attach(resp)
+            produced = False
+            error = None
+            try:
+                with resp:
+                    for delta in self._iter_sse(resp):
+                        if not produced:
+                            produced = True
+                            self._first_token_times[target.model].append(time.monotonic() - request_start)
+                        yield delta
+            except requests.RequestException as e:
+                error = e
+            finally:
+                cancelled = leg is not None and leg.cancelled.is_set()
+                self._finish(target, backend, request_start, error, cancelled=cancelled)
+            if error is None or (leg is not None and leg.cancelled.is_set()):
+                return
+            # A stream that broke before its first token can start over
+            if produced or not self._retry_wait(error, attempt):
+                raise error
+
+    def _hedge_delay(self, target: Target) -> Optional[float]:
+        """How long to wait for a first token before hedging, or None to not hedge."""
+        if not self.hedge or len(target.balancer.backends) < 2:
+            return None
+        samples = sorted(self._first_token_times[target.model])
+        if len(samples) < self.hedge_min_samples:
+            return None  # Not enough history to know what slow looks like
+        index = min(int(len(samples) * self.hedge_percentile / 100), len(samples) - 1)
+        return samples[index]
+
+    def _hedged(self, payload: dict, target: Target, delay: float) -> Iterator[str]:
+        """
+        Stream from a first backend; if it has no token after delay, race a
+        duplicate on another backend. The first leg to produce a token wins
+        and the other is cancelled.
+        """
+        events: queue.Queue = queue.Queue()
+        legs: list[_Leg] = []
+
+        def launch(exclude: list):
+            leg = _Leg(list(exclude))
+            legs.append(leg)
+
+            def run():
+                try:
+                    for delta in self._stream(payload, leg.tried, target, leg):
+                        events.put((leg, delta))
+                except Exception as e:
+                    events.put((leg, e))
+                else:
+                    events.put((leg, None))
+
+            # Copy the context so the leg's retries land in the caller's metrics
+            context = copy_context()
+            threading.Thread(target=context.run, args=(run,), daemon=True, name="sinner-hedge").start()
+
+        launch([])
+        winner = None
+        try:
+            while True:
+                waiting = winner is None and len(legs) == 1
+                try:
+                    leg, item = events.get(timeout=delay if waiting else None)
+                except queue.Empty:
+                    metrics.count("llm_hedges")
+                    launch(legs[0].tried)
+                    continue
+                if winner is None:
+                    if isinstance(item, Exception):
+                        leg.done = True
+                        if all(other.done for other in legs):
+                            raise item
+                        continue
+                    winner = leg
+                    for other in legs:
+                        if other is not winner:
+                            other.cancel()
+                if leg is not winner:
+                    continue  # Leftovers from a cancelled leg
+                if item is None:
+                    leg.done = True
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            for leg in legs:
+                if leg is not winner or not leg.done:
+                    leg.cancel()
+
+    def _post(
+        self,
+        payload: dict,
+        tried: list,
+        target: Target,
+        stream: bool = False,
+    ) -> tuple[Backend, requests.Response, float]:
+        """
+        Make one attempt: pick one of the target's backends not tried yet
+        and POST to it.
+        
+        On success the backend stays acquired until _finish is called.
+        
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            requests.exceptions.RequestException: If the attempt fails
+        """
+        target.breaker.before_request()
+        backend = target.balancer.pick(exclude=tuple(tried))
+        tried.append(backend)
+        target.balancer.acquire(backend)
+        start = time.monotonic()
+        try:
+            resp = self.session.post(
+                f"{backend.url}/chat/completions",
+                json=payload,
+                timeout=self.timeout,
+                stream=stream
+            )
+            if not resp.ok:
+                resp.close()
+                resp.raise_for_status()
+        except Exception as e:
+            self._finish(target, backend, start, e)
+            raise
+        return backend, resp, start
+
+    def _finish(
+        self,
+        target: Target,
+        backend: Backend,
+        start: float,
+        error: Optional[BaseException] = None,
+        cancelled: bool = False,
+    ):
+        """
+        Release a backend and report the outcome to its balancer and breaker.
+        
+        A cancelled request (a hedge leg that lost the race) says nothing
+        about the backend's health, and its cut-short time is no latency
+        sample: the backend is only released.
+        """
+        if cancelled:
+            target.balancer.release(backend)
+            target.breaker.abandon_trial()
+            return
+        failed = error is not None and classify_error(error) in RETRYABLE
+        target.balancer.release(backend, latency=None if error else time.monotonic() - start, error=error)
+        if failed:
+            target.breaker.record_failure()
+        else:
+            target.breaker.record_success()
+
+    def _retry_wait(self, error: requests.RequestException, attempt: int) -> bool:
+        """Back off before retrying a failed attempt; False if it should not be retried."""
+        if classify_error(error) not in RETRYABLE or attempt >= self.retry.retries:
+            return False
+        metrics.count("llm_retries")
+        time.sleep(self.retry.delay(attempt, retry_after(error)))
+        return True
+
+    def _cached(self, payload: dict) -> Optional[str]:
+        """Look a request up in the response cache, counting hits and misses."""
+        if not self.cache:
+            return None
+        cached = self.cache.get(payload)
+        metrics.count("cache_hits" if cached is not None else "cache_misses")
+        return cached
+
+    @staticmethod
+    def _count_tokens(prompt: str, content: str, usage: Optional[dict] = None):
+        """Count tokens of a model call, from usage when the server reports it."""
+        if metrics.current() is None:
+            return
+        usage = usage or {}
+        metrics.count("prompt_tokens", usage.get("prompt_tokens") or estimate_tokens(prompt))
+        metrics.count("completion_tokens", usage.get("completion_tokens") or estimate_tokens(content))
+        metrics.count("llm_calls")
+
+    def _payload(
+        self,
+        prompt: str,
+        temperature: float,
+        model: str,
+        max_tokens: Optional[int] = None,
+        stop: Optional[list[str]] = None,
+        system: Optional[str] = None,
+        stream: bool = False,
+    ) -> dict:
+        """Build the chat completions request body."""
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
         payload = {
-            "model": self.model,
-            "messages": [{"role": "user", "content": prompt}],
+            "model": model,
+            "messages": messages,
             "temperature": temperature,
         }
-        resp = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=self.headers,
-            json=payload,
-            timeout=30
-        )
-        resp.raise_for_status()
-        return resp.json()["choices"][0]["message"]["content"].strip()
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        if stop:
+            payload["stop"] = stop
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    @staticmethod
+    def _iter_sse(resp: requests.Response) -> Iterator[str]:
+        """Parse an SSE chat completions stream into content deltas."""
+        for raw in resp.iter_lines():
+            if not raw:
+                continue
+            line = raw.decode("utf-8")
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or [{}]
+            content = (choices[0].get("delta") or {}).get("content")
+            if content:
+                yield content
+
+
+class _Leg:
+    """One of the duplicate requests of a hedged call."""
+
+    def __init__(self, tried: list):
+        self.tried = tried
+        self.cancelled = threading.Event()
+        self.done = False
+        self._response: Optional[requests.Response] = None
+        self._lock = threading.Lock()
+
+    def attach(self, resp: requests.Response):
+        """Remember the leg's current response, so cancel can close it."""
+        with self._lock:
+            self._response = resp
+        if self.cancelled.is_set():
+            self._abort(resp)
+
+    def cancel(self):
+        """Stop this leg, waking it up if it is blocked reading."""
+        self.cancelled.set()
+        with self._lock:
+            resp = self._response
+        if resp is not None:
+            self._abort(resp)
+
+    @staticmethod
+    def _abort(resp: requests.Response):
+        # Closing alone doesn't interrupt a read blocked in another thread.
+        # Once the body is streaming, http.client hands the socket over from
+        # the connection to the response's file object.
+        sock = getattr(getattr(resp.raw, "_connection", None), "sock", None)
+        if sock is None:
+            fp = getattr(getattr(resp.raw, "_fp", None), "fp", None)
+            sock = getattr(getattr(fp, "raw", None), "_sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        resp.close()
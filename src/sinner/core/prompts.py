@@ -4,8 +4,27 @@ Each action gets its own focused prompt.
 """
 
 
+# Generation limits per command. One-line outputs stop at the first blank
+# line and get a small token budget, so the model can't ramble into
+# paragraphs that clean_output would throw away anyway.
+GENERATION_PROFILES = {
+    "name": {"temperature": 0.7, "max_tokens": 32, "stop": ["\n\n"]},
+    "commit": {"temperature": 0.5, "max_tokens": 64, "stop": ["\n\n"]},
+    "squash": {"temperature": 0.5, "max_tokens": 64, "stop": ["\n\n"]},
+    "pr": {"temperature": 0.6, "max_tokens": 512},
+    "comment": {"temperature": 0.7, "max_tokens": 640},
+    "explain": {"temperature": 0.7, "max_tokens": 768},
+    "summarize": {"temperature": 0.3, "max_tokens": 256},
+}
+
+
+def generation_profile(command: str) -> dict:
+    """Generation settings (temperature, max_tokens, stop) for a command"""
+    return dict(GENERATION_PROFILES.get(command, {"temperature": 0.7}))
+
+
 def _sinner_context() -> str:
-    """Shared context about who sinner is - added to all prompts."""
+    """Shared context about who sinner is - the system message of all prompts."""
     return """I am sinner. A local-first CLI agent for developers.
 
 My six commands:
@@ -23,9 +42,26 @@ Zero fluff, pure function. Built to ship.
 """
 
 
-def prompt_name(context: str) -> str:
+# Sent as the system message, byte for byte the same for every command, so
+# the server can keep its prefix in the KV cache. Builders below return only
+# the user message.
+SYSTEM_PROMPT = _sinner_context().strip()
+
+
+# Every builder takes an examples flag so the token budget can leave out the
+# few-shot examples when a prompt doesn't fit.
+
+
+def prompt_name(context: str, examples: bool = True) -> str:
     """Prompt for naming things (variables, functions, classes, etc.)"""
-    return f"""{_sinner_context()}Generate a professional name for a variable, function, class, or module.
+    shots = """
+Examples:
+- "a function that validates emails" → validateEmail (or validate_email for Python)
+- "a class for user sessions" → UserSession
+- "maximum retry count constant" → MAX_RETRY_COUNT
+- "variable storing user authentication token" → authToken (or auth_token for Python)
+""" if examples else ""
+    return f"""Generate a professional name for a variable, function, class, or module.
 
 Context:
 {context}
@@ -38,19 +74,21 @@ Best practices:
 - Be descriptive but not verbose
 - Infer the language from context clues when possible
 - Default to camelCase if language is ambiguous
-
-Examples:
-- "a function that validates emails" → validateEmail (or validate_email for Python)
-- "a class for user sessions" → UserSession
-- "maximum retry count constant" → MAX_RETRY_COUNT
-- "variable storing user authentication token" → authToken (or auth_token for Python)
-
+{shots}
 Respond with ONLY the suggested name. No explanations, no alternatives."""
 
 
-def prompt_commit(changes: str) -> str:
+def prompt_commit(changes: str, examples: bool = True) -> str:
     """Prompt for generating commit messages"""
-    return f"""{_sinner_context()}Generate a conventional commit message.
+    shots = """
+Examples:
+- "made table resonsive on home screen" (typo intentional) → feat(home) -> make table responsive on home screen
+- "fixed bug in login" → fix(auth) -> resolve login validation error
+- "updated readme" → docs(readme) -> update installation instructions
+- "refactored api endpoints" → refactor(api) -> improve endpoint structure
+- "added new components" → feat(ui) -> add new building blocks for user dashboard
+""" if examples else ""
+    return f"""Generate a conventional commit message.
 
 User's description of changes:
 {changes}
@@ -66,21 +104,52 @@ Rules:
 - Description starts with lowercase letter
 - Keep total length under 72 characters
 - Common types: feat, fix, refactor, docs, style, test, chore, perf
+{shots}
+Respond with ONLY the commit message. No explanations, no alternatives."""
+
 
+def prompt_commit_diff(hunks: list[str], files: str = "", description: str = "", examples: bool = True) -> str:
+    """Prompt for generating a commit message from staged changes (hunks most important first)"""
+    hunks_text = "\n\n".join(hunks)
+    note = f"\nUser's description of changes:\n{description}\n" if description else ""
+    shots = """
 Examples:
-- "made table resonsive on home screen" (typo intentional) → feat(home) -> make table responsive on home screen
-- "fixed bug in login" → fix(auth) -> resolve login validation error
-- "updated readme" → docs(readme) -> update installation instructions
-- "refactored api endpoints" → refactor(api) -> improve endpoint structure
-- "added new components" → feat(ui) -> add new building blocks for user dashboard
+- feat(auth) -> add JWT authentication
+- fix(api) -> handle empty response from payment provider
+- refactor(db) -> extract query builder from user repository
+""" if examples else ""
+    return f"""Generate a conventional commit message.
+{note}
+Changed files:
+{files}
+
+Most important changes (unified diff):
+{hunks_text}
+
+Create a commit message in this EXACT format:
+type(scope) -> description
 
+Rules:
+- Describe the purpose of the change, not every file
+- Infer the best scope from the paths and code (e.g., ui, api, auth, db, config, tests)
+- Use imperative mood ("make" not "made", "add" not "added", "fix" not "fixed")
+- Description starts with lowercase letter
+- Keep total length under 72 characters
+- Common types: feat, fix, refactor, docs, style, test, chore, perf
+{shots}
 Respond with ONLY the commit message. No explanations, no alternatives."""
 
 
-def prompt_comment_squash(commits: list[str]) -> str:
+def prompt_comment_squash(commits: list[str], examples: bool = True) -> str:
     """Prompt for generating a single squash merge commit message"""
     commits_text = "\n\n".join(f"- {c}" for c in commits)
-    return f"""{_sinner_context()}Generate ONE commit message that summarizes all these commits.
+    shots = """
+Examples:
+- feat(auth) -> add JWT authentication system
+- docs(install) -> update setup instructions for venv and pipx
+- refactor(core) -> improve prompt handling and formatting
+""" if examples else ""
+    return f"""Generate ONE commit message that summarizes all these commits.
 
 Commits to squash:
 {commits_text}
@@ -94,19 +163,31 @@ Rules:
 - Description starts with lowercase letter
 - Under 72 characters
 - Capture the main change across all commits
+{shots}
+Your single commit message:"""
 
-Examples:
-- feat(auth) -> add JWT authentication system
-- docs(install) -> update setup instructions for venv and pipx
-- refactor(core) -> improve prompt handling and formatting
 
-Your single commit message:"""
+def prompt_summarize_chunk(commits: list[str], examples: bool = True) -> str:
+    """Prompt for condensing one chunk of a large commit range (map step)"""
+    commits_text = "\n".join(f"- {c}" for c in commits)
+    return f"""Condense this part of a longer commit history.
 
+Commits:
+{commits_text}
 
-def prompt_comment_pr(commits: list[str]) -> str:
+Rules:
+- 3 to 6 short lines, one change per line, each starting with "- "
+- Merge related commits into one line
+- Keep concrete names (modules, commands, files) from the commits
+- Only facts from the commits above, nothing invented
+
+Your condensed list:"""
+
+
+def prompt_comment_pr(commits: list[str], examples: bool = True) -> str:
     """Prompt for PR descriptions (title + bullets)"""
     commits_text = "\n\n".join(f"- {c}" for c in commits)
-    return f"""{_sinner_context()}Summarize what changed.
+    return f"""Summarize what changed.
 
 Commits:
 {commits_text}
@@ -114,10 +195,13 @@ Commits:
 Technical, simple, precise. No filler. To the point."""
 
 
-def prompt_comment(commits: list[str]) -> str:
+def prompt_comment(commits: list[str], examples: bool = True) -> str:
     """Prompt for informal, detailed summaries of recent work"""
     commits_text = "\n\n".join(f"- {c}" for c in commits)
-    return f"""{_sinner_context()}Summarize these recent changes in a casual, detailed way. Talk to the developer like a friendly colleague catching them up on what's been happening.
+    shots = """
+Example: "Hey! So the auth system got a nice refactoring - JWT handling was moved into a separate service and refresh token support was added. Error handling also got cleaned up to make expired sessions more graceful."
+""" if examples else ""
+    return f"""Summarize these recent changes in a casual, detailed way. Talk to the developer like a friendly colleague catching them up on what's been happening.
 
 Recent commits:
 {commits_text}
@@ -136,20 +220,18 @@ CRITICAL RULES:
 - Do NOT invent features, models, or details not present in the commits
 - If unsure about specifics, keep it general ("some improvements were made" vs specific feature names)
 - Stick to the facts from the commits, nothing more
-
-Example: "Hey! So the auth system got a nice refactoring - JWT handling was moved into a separate service and refresh token support was added. Error handling also got cleaned up to make expired sessions more graceful."
-
+{shots}
 Your summary:"""
 
 
-def prompt_explain(code_or_concept: str) -> str:
+def prompt_explain(code_or_concept: str, examples: bool = True) -> str:
     """Prompt for explaining code or concepts"""
     # Special case: if asking about sinner itself, provide detailed self-description
     lower_query = code_or_concept.lower()
     sinner_keywords = ["what is sinner", "what can you do", "who are you", "tell me about", "what do you do", "hey sinner"]
     
     if "sinner" in lower_query and any(keyword in lower_query for keyword in sinner_keywords):
-        return f"""{_sinner_context()}The user is asking about you. Explain who you are and what you do.
+        return f"""The user is asking about you. Explain who you are and what you do.
 
 Keep the tone: precise, confident, methodical. First person. Quiet confidence, calm precision.
 
@@ -161,7 +243,7 @@ Cover:
 
 Be direct. No unnecessary detail."""
     
-    return f"""{_sinner_context()}Explain this concept clearly and concisely.
+    return f"""Explain this concept clearly and concisely.
 
 {code_or_concept}
 
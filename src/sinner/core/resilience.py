@@ -0,0 +1,135 @@
+"""
+Failure handling for LLM requests.
+Error classification, jittered exponential backoff and a circuit breaker
+that fails fast while the server is down.
+"""
+
+import random
+import threading
+import time
+from typing import Optional
+
+import requests
+
+# Error kinds, from classify_error()
+CONNECT = "connect"      # Could not reach the server
+TIMEOUT = "timeout"      # Connected, but no answer within the read timeout
+SERVER = "server"        # 5xx or 429: the server is struggling
+CLIENT = "client"        # Other 4xx: the request itself is wrong, retrying won't help
+CIRCUIT_OPEN = "circuit_open"
+OTHER = "other"
+
+RETRYABLE = (CONNECT, TIMEOUT, SERVER)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Failing fast: the server has been failing and is in its cooldown."""
+
+
+def classify_error(error: BaseException) -> str:
+    """Sort a request failure into one of the error kinds."""
+    if isinstance(error, CircuitOpenError):
+        return CIRCUIT_OPEN
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else 500
+        return SERVER if status >= 500 or status == 429 else CLIENT
+    if isinstance(error, requests.ConnectionError):  # Includes ConnectTimeout
+        return CONNECT
+    if isinstance(error, requests.Timeout):
+        return TIMEOUT
+    return OTHER
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After), if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+class RetryPolicy:
+    """
+    How often and how long to wait between attempts.
+
+    Delays use full jitter: a random wait between 0 and base * 2^attempt
+    (capped), so workers that failed together don't retry together.
+    """
+
+    def __init__(self, retries: int = 2, base: float = 0.5, cap: float = 8.0):
+        self.retries = retries
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt: int, server_hint: Optional[float] = None) -> float:
+        """Wait before retry number attempt + 1 (attempt counts from 0)."""
+        if server_hint is not None:
+            return min(server_hint, self.cap)
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Stop sending requests to a server that keeps failing.
+
+    Closed: requests flow, consecutive failures are counted. After
+    threshold failures the circuit opens and every request fails fast with
+    CircuitOpenError for cooldown seconds. Then one trial request is let
+    through (half-open): success closes the circuit, failure reopens it.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 15.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._trial or time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def before_request(self):
+        """
+        Raise CircuitOpenError unless a request may go out now.
+
+        Raises:
+            CircuitOpenError: While open, or while a half-open trial is running
+        """
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            if self.opened_at is None:
+                return
+            remaining = self.cooldown - (time.monotonic() - self.opened_at)
+            if remaining <= 0 and not self._trial:
+                self._trial = True  # This request is the trial
+                return
+            wait = f", retrying in {remaining:.0f}s" if remaining > 0 else ""
+            raise CircuitOpenError(f"LLM server unavailable after {self.failures} failures (circuit open{wait})")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def abandon_trial(self):
+        """Forget a half-open trial that ended without an outcome (cancelled), so another can run."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold > 0:
+                self.opened_at = time.monotonic()
+            self._trial = False
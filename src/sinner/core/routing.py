@@ -0,0 +1,73 @@
+"""
+Per-command model routing.
+Each command can run on its own model and server, with a chain of
+fallbacks, so one-liners use a small fast model and long-form output a
+bigger one.
+"""
+
+import os
+import re
+from typing import Optional
+
+from .balancer import Balancer
+from .resilience import CircuitBreaker
+
+# Everything the Controller asks the model for, map-reduce chunks included
+ROUTED_COMMANDS = ("name", "commit", "comment", "pr", "squash", "explain", "summarize")
+
+# Model ids can contain "@" themselves (LM Studio quant suffixes), so only
+# an @ followed by a URL separates the server
+_TARGET = re.compile(r"^(?P<model>.*?)(?:@(?P<url>https?://\S+))?$")
+
+
+class Target:
+    """One model on one set of backends, a link in a fallback chain."""
+
+    def __init__(self, model: str, balancer: Balancer, breaker: CircuitBreaker):
+        self.model = model
+        self.balancer = balancer
+        self.breaker = breaker
+
+    def __repr__(self):
+        return f"Target({self.model!r} at {self.balancer.backends[0].url!r})"
+
+
+def parse_chain(spec: str) -> list[tuple[str, Optional[str]]]:
+    """
+    Parse a fallback chain like "qwen2.5-0.5b@http://10.0.0.5:1234/v1, gemma-3n".
+
+    Args:
+        spec: Comma-separated model[@url] entries, first choice first
+
+    Returns:
+        (model, url) pairs; url is None for the default backends
+
+    Raises:
+        ValueError: If an entry has no model
+    """
+    chain = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        match = _TARGET.match(entry)
+        if match is None or not match.group("model").strip():
+            raise ValueError(f"Invalid route entry: '{entry}' (expected model or model@http://host:port/v1)")
+        chain.append((match.group("model").strip(), match.group("url")))
+    return chain
+
+
+def routes_from_env() -> dict[str, list[tuple[str, Optional[str]]]]:
+    """
+    Read SINNER_ROUTE_<COMMAND> settings (e.g. SINNER_ROUTE_NAME).
+
+    Returns:
+        Command -> fallback chain, for the commands that have a route
+    """
+    routes = {}
+    for command in ROUTED_COMMANDS:
+        spec = os.getenv(f"SINNER_ROUTE_{command.upper()}", "")
+        chain = parse_chain(spec)
+        if chain:
+            routes[command] = chain
+    return routes
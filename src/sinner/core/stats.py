@@ -0,0 +1,158 @@
+"""
+Usage report from the local metrics log.
+One streaming pass over the JSONL log with fixed-size state per group, so
+the log can grow to hundreds of MB without being loaded into memory.
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Iterable, Optional
+
+GROUP_FIELDS = ("command", "model", "day")
+
+
+class Histogram:
+    """
+    Log-bucketed histogram for streaming percentiles.
+
+    Values land in buckets that grow by `growth` (2% by default), so any
+    percentile is within that relative error while memory stays at a few
+    hundred buckets however many values are added.
+    """
+
+    def __init__(self, growth: float = 1.02):
+        self.log_growth = math.log(growth)
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        value = max(value, 0.001)
+        index = math.ceil(math.log(value) / self.log_growth)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Approximate percentile (q in 0..100), None when empty."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Bucket upper bound, clamped to what was actually seen
+                return min(max(math.exp(index * self.log_growth), self.min), self.max)
+        return self.max
+
+
+class Group:
+    """Running totals for one (command, model, day) combination."""
+
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.latency = Histogram()
+        self.ttft = Histogram()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, record: dict):
+        self.runs += 1
+        if record.get("error"):
+            self.errors += 1
+        if record.get("latency_ms") is not None:
+            self.latency.add(record["latency_ms"])
+        if record.get("ttft_ms") is not None:
+            self.ttft.add(record["ttft_ms"])
+        self.prompt_tokens += record.get("prompt_tokens") or 0
+        self.completion_tokens += record.get("completion_tokens") or 0
+        self.cache_hits += record.get("cache_hits") or 0
+        self.cache_misses += record.get("cache_misses") or 0
+
+    def summary(self) -> dict:
+        def rounded(value):
+            return round(value, 1) if value is not None else None
+
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "runs": self.runs,
+            "error_rate": round(self.errors / self.runs, 3),
+            "p50_ms": rounded(self.latency.percentile(50)),
+            "p95_ms": rounded(self.latency.percentile(95)),
+            "p99_ms": rounded(self.latency.percentile(99)),
+            "ttft_p50_ms": rounded(self.ttft.percentile(50)),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cache_hit_rate": round(self.cache_hits / lookups, 3) if lookups else None,
+        }
+
+
+def iter_records(lines: Iterable[str]) -> Iterable[dict]:
+    """Parse log lines lazily, skipping blank and corrupt ones."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # e.g. a line cut short by a crash
+        if isinstance(record, dict):
+            yield record
+
+
+def aggregate(
+    records: Iterable[dict],
+    by: tuple[str, ...] = ("command",),
+    since: Optional[str] = None,
+    command: Optional[str] = None,
+    model: Optional[str] = None,
+) -> dict[tuple, dict]:
+    """
+    Aggregate invocation records into per-group summaries in one pass.
+
+    Args:
+        records: Metrics log records, read lazily
+        by: Fields to group by (any of command, model, day)
+        since: Only count records on or after this day (YYYY-MM-DD)
+        command: Only count this command
+        model: Only count this model
+
+    Returns:
+        Group key tuple -> summary, sorted by key
+
+    Raises:
+        ValueError: If a group field is unknown
+    """
+    unknown = [field for field in by if field not in GROUP_FIELDS]
+    if unknown:
+        raise ValueError(f"Cannot group by {', '.join(unknown)} (use {', '.join(GROUP_FIELDS)})")
+
+    groups: dict[tuple, Group] = {}
+    for record in records:
+        day = str(record.get("ts", ""))[:10]
+        if since and day < since:
+            continue
+        if command and record.get("command") != command:
+            continue
+        if model and record.get("model") != model:
+            continue
+        values = {"command": record.get("command"), "model": record.get("model"), "day": day}
+        key = tuple(str(values[field]) for field in by)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = Group()
+        group.add(record)
+    return {key: groups[key].summary() for key in sorted(groups)}
+
+
+def aggregate_file(path: Path, **options) -> dict[tuple, dict]:
+    """Aggregate a metrics log file (see aggregate for options)."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return aggregate(iter_records(f), **options)
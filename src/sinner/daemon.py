@@ -0,0 +1,237 @@
+"""
+Resident daemon mode.
+A warm Controller behind a Unix socket, plus the light client the CLI uses
+to forward commands to it. The client side only needs the standard library.
+"""
+
+import json
+import os
+import socket
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+CONNECT_TIMEOUT = 0.5
+
+
+class DaemonError(Exception):
+    """The daemon accepted a request but could not complete it."""
+
+
+def socket_path() -> Path:
+    """Where the daemon listens (SINNER_SOCKET overrides)."""
+    custom = os.getenv("SINNER_SOCKET")
+    if custom:
+        return Path(custom).expanduser()
+    return Path.home() / ".config" / "sinner" / "daemon.sock"
+
+
+def _connect(path: Path) -> Optional[socket.socket]:
+    """Open a connection to the daemon, or None if it is not running."""
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)  # Generation can take as long as it takes
+    return sock
+
+
+def request(
+    message: dict,
+    on_token: Optional[Callable[[str], None]] = None,
+    path: Optional[Path] = None,
+    on_notice: Optional[Callable[[str], None]] = None,
+) -> Optional[dict]:
+    """
+    Send one request to the daemon and wait for its final reply.
+
+    Args:
+        message: Request object (op, command, input, ...)
+        on_token: Called with each streamed token reply
+        path: Socket to use (default: socket_path())
+        on_notice: Called with each notice reply
+
+    Returns:
+        Final reply object, or None if no daemon is listening
+
+    Raises:
+        DaemonError: If the connection drops or the daemon reports an error
+    """
+    sock = _connect(path or socket_path())
+    if sock is None:
+        return None
+    with sock, sock.makefile("rwb") as stream:
+        try:
+            stream.write(json.dumps(message).encode("utf-8") + b"\n")
+            stream.flush()
+            for line in stream:
+                reply = json.loads(line)
+                if "token" in reply:
+                    if on_token:
+                        on_token(reply["token"])
+                    continue
+                if "notice" in reply:
+                    if on_notice:
+                        on_notice(reply["notice"])
+                    continue
+                if "error" in reply:
+                    raise DaemonError(reply["error"])
+                return reply
+        except OSError as e:
+            raise DaemonError(f"daemon connection lost: {e}")
+    raise DaemonError("daemon closed the connection without a reply")
+
+
+def forward(
+    command: str,
+    input_data: str,
+    on_token: Optional[Callable[[str], None]] = None,
+    no_cache: bool = False,
+    flags: Optional[dict] = None,
+    on_notice: Optional[Callable[[str], None]] = None,
+) -> Optional[tuple[str, Optional[float]]]:
+    """
+    Run a command on the daemon if one is running.
+
+    Args:
+        command: Controller command name
+        input_data: Command input
+        on_token: Called with streamed output, if streaming
+        no_cache: Bypass the daemon's response cache
+        flags: Extra Controller.run flags (must be JSON-serializable)
+        on_notice: Called with notes about the run (e.g. a trimmed prompt)
+
+    Returns:
+        (result, time to first token) or None to fall back to in-process
+    """
+    if os.getenv("SINNER_DAEMON", "1").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    reply = request(
+        {
+            "op": "run",
+            "command": command,
+            "input": input_data,
+            "stream": on_token is not None,
+            "no_cache": no_cache,
+            "flags": flags or {},
+        },
+        on_token=on_token,
+        on_notice=on_notice,
+    )
+    if reply is None:
+        return None
+    return reply["result"], reply.get("ttft")
+
+
+def serve(path: Optional[Path] = None, on_ready: Optional[Callable[[Path], None]] = None):
+    """
+    Run the daemon in the foreground until stopped.
+
+    Keeps one Controller (with its connection pool and cache) warm and
+    serves each client connection on its own thread.
+
+    Raises:
+        RuntimeError: If another daemon is already listening on the socket
+    """
+    import socketserver
+    import time
+    from sinner.core.controller import Controller
+    from sinner.core.llm_client import LLMClient
+
+    path = path or socket_path()
+    if request({"op": "ping"}, path=path) is not None:
+        raise RuntimeError(f"daemon already running on {path}")
+    if path.exists():
+        path.unlink()  # Stale socket from a daemon that died
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    controllers = {False: Controller()}
+    controllers_lock = threading.Lock()
+
+    def controller_for(no_cache: bool) -> Controller:
+        with controllers_lock:
+            if no_cache not in controllers:
+                client = LLMClient(use_cache=False)
+                # One window of first-token times, so hedging warms up on all requests
+                client._first_token_times = controllers[False].llm._first_token_times
+                controllers[no_cache] = Controller(client)
+            return controllers[no_cache]
+
+    class Handler(socketserver.StreamRequestHandler):
+        def setup(self):
+            super().setup()
+            # Notices can come from map-reduce worker threads while tokens stream
+            self.write_lock = threading.Lock()
+
+        def send(self, reply: dict):
+            data = json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n"
+            with self.write_lock:
+                self.wfile.write(data)
+                self.wfile.flush()
+
+        def handle(self):
+            try:
+                message = json.loads(self.rfile.readline())
+            except ValueError:
+                self.send({"error": "invalid request"})
+                return
+            op = message.get("op", "run")
+
+            if op == "ping":
+                from sinner import __version__
+                self.send({"ok": True, "pid": os.getpid(), "version": __version__})
+            elif op == "stop":
+                self.send({"ok": True})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            elif op == "run":
+                self.run_command(message)
+            else:
+                self.send({"error": f"unknown op: {op}"})
+
+        def run_command(self, message: dict):
+            controller = controller_for(bool(message.get("no_cache")))
+            start = time.perf_counter()
+            first_token = []
+
+            def on_token(text: str):
+                if not first_token:
+                    first_token.append(time.perf_counter() - start)
+                self.send({"token": text})
+
+            try:
+                result = controller.run(
+                    message["command"],
+                    message.get("input", ""),
+                    on_token=on_token if message.get("stream") else None,
+                    on_notice=lambda text: self.send({"notice": text}),
+                    **(message.get("flags") or {}),
+                )
+            except (BrokenPipeError, ConnectionResetError):
+                return  # Client went away mid-stream
+            except Exception as e:
+                self.send({"error": str(e)})
+                return
+            self.send({"result": result, "ttft": first_token[0] if first_token else None})
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    old_umask = os.umask(0o177)  # Socket readable by the owner only
+    try:
+        server = Server(str(path), Handler)
+    finally:
+        os.umask(old_umask)
+
+    try:
+        if on_ready:
+            on_ready(path)
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if path.exists():
+            path.unlink()
@@ -0,0 +1,394 @@
+"""
+Local OpenAI-compatible stub server.
+Speaks the /v1/chat/completions (plain and SSE) and /v1/models subset that
+LLMClient uses, with configurable latency, token rate, errors and canned
+responses. For benchmarks and tests on machines without LM Studio.
+
+Run it:
+    python -m sinner.stub_server --port 1234 --tokens-per-s 50 --latency 0.2
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# Canned answers matched against the prompt (first match wins)
+DEFAULT_RESPONSES = [
+    ("Condense this part", "- Reworked the formatter output\n- Added git integration helpers\n- Fixed configuration loading"),
+    ("Generate a professional name", "validateEmail"),
+    ("Generate ONE commit message", "refactor(core) -> improve prompt handling and formatting"),
+    ("Generate a conventional commit message", "feat(auth) -> add JWT authentication"),
+    ("Summarize what changed", "Updated project configuration\n\n"
+                               "- Formatter: standardized bullet points and removed bold markdown\n"
+                               "- Commands: restructured git commands and added a terminal signature"),
+    ("casual, detailed way", "Hey! So the formatter got some cleanup and the git commands were reorganized. "
+                             "Output is now more consistent across commands."),
+    ("Explain", "A closure is a function that keeps access to variables from the scope where it was defined.\n\n"
+                "Think of it as a LEGO brick that remembers which set it came from."),
+]
+DEFAULT_RESPONSE = "ok"
+
+_TOKEN = re.compile(r"\s*\S+|\s+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into word-sized pseudo tokens that join back exactly."""
+    return _TOKEN.findall(text)
+
+
+@dataclass
+class StubConfig:
+    """
+    Behaviour of the stub model.
+
+    latency: seconds before the first token (prefill)
+    tokens_per_s: generation speed after the first token (0 = instant)
+    error_rate: probability of answering error_status instead
+    ramble: text generated after the answer (following a blank line),
+        repeated until max_tokens or a stop sequence, to mimic models
+        that keep talking
+    strict_model: answer 404 to requests for any other model, like a
+        server that only serves the model it has loaded
+    context_tokens: reject prompts longer than this with 400 (0 = no limit)
+    tokenize_endpoint: serve POST /tokenize like llama.cpp
+    prefill_tokens_per_s: prompt processing speed, added to latency for
+        the prompt tokens not already in the slot's cache (0 = free)
+    slots: serve GET /props like llama.cpp, with this many slots that
+        each keep the last prompt for requests with cache_prompt and
+        serve one request at a time (0 = none, unlimited parallel requests)
+    """
+
+    model: str = "stub-model"
+    latency: float = 0.0
+    tokens_per_s: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    responses: list = field(default_factory=lambda: list(DEFAULT_RESPONSES))
+    default_response: str = DEFAULT_RESPONSE
+    ramble: str = ""
+    max_tokens: int = 512
+    seed: Optional[int] = 0
+    strict_model: bool = False
+    context_tokens: int = 0
+    tokenize_endpoint: bool = False
+    prefill_tokens_per_s: float = 0.0
+    slots: int = 0
+
+
+class StubServer:
+    """
+    Threaded stub server, usable as a context manager.
+
+    Example:
+        with StubServer(StubConfig(tokens_per_s=100)) as stub:
+            os.environ["LMSTUDIO_BASE_URL"] = stub.base_url
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self.requests = 0
+        self.tokenize_requests = 0
+        self.errors = 0
+        self.prefill_tokens = 0  # Prompt tokens processed
+        self.cached_tokens = 0  # Prompt tokens reused from a slot's cache
+        self._slots: list[list[str]] = [[] for _ in range(self.config.slots)]
+        self._slot_order = list(range(self.config.slots))  # Least recently used first
+        self._busy: set[int] = set()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._random = random.Random(self.config.seed)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def should_fail(self) -> bool:
+        """Decide (reproducibly, given the seed) whether this request errors."""
+        with self._lock:
+            self.requests += 1
+            failed = self.config.error_rate > 0 and self._random.random() < self.config.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+
+    def acquire_slot(self, id_slot: Optional[int]) -> Optional[int]:
+        """
+        Wait for a slot, like llama.cpp: id_slot if given (queueing behind
+        its current request), else the least recently used idle one.
+
+        Returns:
+            The slot, or None when the stub has no slots
+        """
+        if not self._slots:
+            return None
+        pinned = id_slot if id_slot is not None and 0 <= id_slot < len(self._slots) else None
+        with self._idle:
+            while True:
+                idle = [slot for slot in self._slot_order if slot not in self._busy]
+                if pinned is None and idle:
+                    slot = idle[0]
+                    break
+                if pinned is not None and pinned in idle:
+                    slot = pinned
+                    break
+                self._idle.wait()
+            self._busy.add(slot)
+            self._slot_order.remove(slot)
+            self._slot_order.append(slot)
+            return slot
+
+    def release_slot(self, slot: Optional[int]):
+        """Hand a slot back once its request is answered."""
+        if slot is None:
+            return
+        with self._idle:
+            self._busy.discard(slot)
+            self._idle.notify_all()
+
+    def prefill(self, prompt_tokens: list[str], cache_prompt: bool, slot: Optional[int]) -> int:
+        """
+        Run a prompt through a slot, like llama.cpp's KV cache: with
+        cache_prompt, the prefix it shares with the slot's last prompt is
+        reused.
+
+        Returns:
+            The number of prompt tokens that had to be processed
+        """
+        with self._lock:
+            reused = 0
+            if slot is not None:
+                if cache_prompt:
+                    for ours, theirs in zip(prompt_tokens, self._slots[slot]):
+                        if ours != theirs:
+                            break
+                        reused += 1
+                self._slots[slot] = prompt_tokens
+            self.cached_tokens += reused
+            self.prefill_tokens += len(prompt_tokens) - reused
+            return len(prompt_tokens) - reused
+
+    def completion_tokens(self, prompt: str, max_tokens: Optional[int], stop: list[str]) -> list[str]:
+        """The tokens the stub model generates for a prompt."""
+        answer = next((text for marker, text in self.config.responses if marker in prompt), self.config.default_response)
+        limit = max_tokens or self.config.max_tokens
+        tokens = []
+        text = ""
+        for token in self._generate(answer):
+            if len(tokens) >= limit:
+                break
+            text += token
+            tokens.append(token)
+            cut = min((text.index(s) for s in stop if s in text), default=None)
+            if cut is not None:
+                # Output ends right before the stop sequence, like a real server
+                return tokenize(text[:cut])
+        return tokens
+
+    def _generate(self, answer: str):
+        yield from tokenize(answer)
+        if self.config.ramble:
+            yield from tokenize("\n\n" + self.config.ramble)
+            while True:
+                yield from tokenize(" " + self.config.ramble)
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status: int, body: dict):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client gave up (e.g. read timeout)
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/v1/models":
+                    self.send_json(200, {"object": "list", "data": [{"id": stub.config.model, "object": "model"}]})
+                elif self.path.rstrip("/") == "/props" and stub.config.slots:
+                    self.send_json(200, {"total_slots": stub.config.slots, "model_path": stub.config.model})
+                else:
+                    self.send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self.send_json(400, {"error": {"message": "invalid JSON"}})
+                    return
+                if self.path.rstrip("/") == "/tokenize" and stub.config.tokenize_endpoint:
+                    stub.tokenize_requests += 1
+                    self.send_json(200, {"tokens": list(range(len(tokenize(str(body.get("content", ""))))))})
+                    return
+                if self.path.rstrip("/") != "/v1/chat/completions":
+                    self.send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                if stub.should_fail():
+                    self.send_json(stub.config.error_status, {"error": {"message": "stub error"}})
+                    return
+                if stub.config.strict_model and body.get("model") != stub.config.model:
+                    self.send_json(404, {"error": {"message": f"model '{body.get('model')}' not found"}})
+                    return
+
+                messages = body.get("messages") or []
+                prompt = "\n".join(str(m.get("content", "")) for m in messages)
+                prompt_tokens = tokenize(prompt)
+                if stub.config.context_tokens and len(prompt_tokens) > stub.config.context_tokens:
+                    message = f"prompt is {len(prompt_tokens)} tokens, context is {stub.config.context_tokens}"
+                    self.send_json(400, {"error": {"message": message}})
+                    return
+                stop = body.get("stop") or []
+                if isinstance(stop, str):
+                    stop = [stop]
+                tokens = stub.completion_tokens(prompt, body.get("max_tokens"), stop)
+                usage = {
+                    "prompt_tokens": len(prompt_tokens),
+                    "completion_tokens": len(tokens),
+                    "total_tokens": len(prompt_tokens) + len(tokens),
+                }
+
+                slot = stub.acquire_slot(body.get("id_slot"))
+                try:
+                    self.complete(body, prompt_tokens, tokens, usage, slot)
+                finally:
+                    stub.release_slot(slot)
+
+            def complete(self, body: dict, prompt_tokens: list[str], tokens: list[str], usage: dict, slot: Optional[int]):
+                processed = stub.prefill(prompt_tokens, bool(body.get("cache_prompt")), slot)
+                speed = stub.config.prefill_tokens_per_s
+                latency = stub.config.latency + (processed / speed if speed else 0)
+                delay = 1 / stub.config.tokens_per_s if stub.config.tokens_per_s else 0
+                if body.get("stream"):
+                    self.stream(tokens, latency, delay, usage)
+                    return
+                time.sleep(latency + delay * len(tokens))
+                self.send_json(200, {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "model": stub.config.model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": usage,
+                })
+
+            def stream(self, tokens: list[str], latency: float, delay: float, usage: dict):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                def event(delta: dict, finish: Optional[str] = None, extra: Optional[dict] = None):
+                    chunk = {
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion.chunk",
+                        "model": stub.config.model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                    }
+                    chunk.update(extra or {})
+                    self.wfile.write(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+                    self.wfile.flush()
+
+                try:
+                    # Like real servers, headers go out at once and prefill delays the first token
+                    self.wfile.flush()
+                    time.sleep(latency)
+                    event({"role": "assistant"})
+                    for i, token in enumerate(tokens):
+                        if i and delay:
+                            time.sleep(delay)
+                        event({"content": token})
+                    event({}, finish="stop", extra={"usage": usage})
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client stopped reading
+
+        return Handler
+
+
+def main(argv: Optional[list[str]] = None):
+    """Run the stub server in the foreground."""
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server for sinner benchmarks and tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--model", default="stub-model")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-s", type=float, default=0.0, help="Generation speed (0 = instant)")
+    parser.add_argument("--prefill-tokens-per-s", type=float, default=0.0, help="Prompt processing speed (0 = free)")
+    parser.add_argument("--slots", type=int, default=0, help="llama.cpp-style slots with prompt caching (0 = none)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--ramble", default="", help="Text the model keeps generating after its answer")
+    parser.add_argument("--responses", help="JSON file of [[prompt substring, response], ...]")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        model=args.model,
+        latency=args.latency,
+        tokens_per_s=args.tokens_per_s,
+        prefill_tokens_per_s=args.prefill_tokens_per_s,
+        slots=args.slots,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        ramble=args.ramble,
+        seed=args.seed,
+    )
+    if args.responses:
+        with open(args.responses, "r", encoding="utf-8") as f:
+            config.responses = [tuple(pair) for pair in json.load(f)] + config.responses
+
+    server = StubServer(config, host=args.host, port=args.port)
+    print(f"sinner stub server on {server.base_url} (model {config.model})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 """Utility modules for sinner."""
 
-from .git_integration import GitIntegration
+from .git_integration import Commit, GitIntegration
 from .banner import show_banner
-from .formatter import OutputFormatter
+from .formatter import OutputFormatter, StreamFormatter
 
-__all__ = ["GitIntegration", "show_banner", "OutputFormatter"]
+__all__ = ["Commit", "GitIntegration", "show_banner", "OutputFormatter", "StreamFormatter"]
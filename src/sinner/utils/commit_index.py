@@ -0,0 +1,373 @@
+"""
+Per-repository SQLite index of commit metadata.
+Kept up to date incrementally from the last indexed HEAD, so count,
+date-range, author and path queries on large histories don't walk git
+log every time. Rewritten history (force-push, rebase, branch switch)
+drops the commits HEAD no longer reaches.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .git_integration import Commit
+
+DEFAULT_INDEX_DIR = Path.home() / ".config" / "sinner" / "index"
+
+# Bump when the schema changes: old index files are rebuilt
+SCHEMA_VERSION = "1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS commits (
+    seq INTEGER PRIMARY KEY,      -- Grows with every indexed commit, breaks ties in time
+    sha TEXT UNIQUE NOT NULL,
+    parents INTEGER NOT NULL,
+    author TEXT NOT NULL,
+    email TEXT NOT NULL,
+    date TEXT NOT NULL,           -- Author date, ISO 8601
+    time INTEGER NOT NULL,        -- Committer date, what --since and --until compare
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS edges (child TEXT NOT NULL, parent TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS paths (seq INTEGER NOT NULL, path TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS commits_time ON commits (time);
+CREATE INDEX IF NOT EXISTS edges_child ON edges (child);
+CREATE INDEX IF NOT EXISTS paths_path ON paths (path);
+CREATE INDEX IF NOT EXISTS paths_seq ON paths (seq);
+"""
+
+# Operators in a POSIX basic regex when escaped, literal characters otherwise
+_BRE_SWAPPED = set("(){}|+?")
+
+# Fields of one indexed commit, oldest first (--reverse); \x1e ends them, paths follow
+_FORMAT = "%H%x1f%P%x1f%an%x1f%ae%x1f%aI%x1f%ct%x1f%s%x1f%b%x1e"
+
+
+class CommitIndex:
+    """
+    Commit metadata of one repository in SQLite (WAL mode, so readers
+    don't wait for an update).
+
+    Example:
+        with CommitIndex.open() as index:
+            index.update()
+            recent = list(index.query(count=500, author="ada"))
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+        self.db.create_function("regexp", 2, _regexp, deterministic=True)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        version = self._schema_version()
+        if version not in (None, SCHEMA_VERSION):
+            self.db.executescript(
+                "DROP TABLE commits; DROP TABLE edges; DROP TABLE paths; DELETE FROM meta WHERE key = 'head';"
+            )
+        self.db.executescript(SCHEMA)
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (SCHEMA_VERSION,))
+
+    @classmethod
+    def open(cls, git_dir: Optional[str] = None) -> "CommitIndex":
+        """
+        The index of the repository at git_dir (default: the current one),
+        stored under SINNER_INDEX_DIR (default ~/.config/sinner/index).
+
+        Raises:
+            RuntimeError: If not in a git repository
+        """
+        if git_dir is None:
+            from .git_objects import GitObjectError, Repository
+            try:
+                git_dir = str(Repository.discover().common_dir)
+            except GitObjectError:
+                git_dir = os.path.abspath(_git(["rev-parse", "--git-common-dir"]).strip())
+        digest = hashlib.sha256(os.path.realpath(git_dir).encode("utf-8")).hexdigest()[:16]
+        folder = Path(os.getenv("SINNER_INDEX_DIR") or DEFAULT_INDEX_DIR).expanduser()
+        return cls(folder / f"{digest}.sqlite")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _schema_version(self) -> Optional[str]:
+        try:
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        except sqlite3.OperationalError:
+            return None  # New file
+        return row[0] if row else None
+
+    @property
+    def head(self) -> Optional[str]:
+        """The commit the index was last brought up to, if any."""
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'head'").fetchone()
+        return row[0] if row else None
+
+    def update(self, head: Optional[str] = None) -> int:
+        """
+        Bring the index up to HEAD.
+
+        Only commits HEAD reaches that the last indexed HEAD doesn't are
+        read from git. If HEAD no longer descends from it (force-push,
+        rebase, another branch), commits it doesn't reach are dropped.
+
+        Args:
+            head: SHA to index up to (default: the current HEAD)
+
+        Returns:
+            How many commits were added
+
+        Raises:
+            RuntimeError: If git fails
+        """
+        head = head or _current_head()
+        if head is None or head == self.head:
+            return 0
+        # One writer at a time; a concurrent update may have done the work already
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            old = self.head
+            if old == head:
+                self.db.execute("COMMIT")
+                return 0
+            added, fast_forward = 0, old is None
+            try:
+                records = _log(head, exclude=old)
+                for sha, parents in self._insert(records):
+                    added += 1
+                    fast_forward = fast_forward or old in parents
+            except RuntimeError:
+                if old is None:
+                    raise
+                # The old HEAD is gone (rewritten and pruned): index all of HEAD's history
+                for _ in self._insert(_log(head)):
+                    added += 1
+            if not fast_forward:
+                self._prune(head)
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('head', ?)", (head,))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return added
+
+    def _insert(self, records: Iterator[tuple]) -> Iterator[tuple[str, list[str]]]:
+        """Store commits (oldest first), yielding each new one's SHA and parents."""
+        for sha, parents, author, email, date, time, subject, body, paths in records:
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO commits (sha, parents, author, email, date, time, subject, body)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (sha, len(parents), author, email, date, time, subject, body),
+            )
+            if not cursor.rowcount:
+                continue  # Already indexed (rebuilding after a rewrite)
+            seq = cursor.lastrowid
+            self.db.executemany("INSERT INTO edges VALUES (?, ?)", [(sha, parent) for parent in parents])
+            self.db.executemany("INSERT INTO paths VALUES (?, ?)", [(seq, path) for path in paths])
+            yield sha, parents
+
+    def _prune(self, head: str):
+        """Drop every commit head doesn't reach."""
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS reach (sha TEXT PRIMARY KEY)")
+        self.db.execute("DELETE FROM reach")
+        self.db.execute(
+            "INSERT INTO reach WITH RECURSIVE walk(sha) AS ("
+            " SELECT ? UNION SELECT edges.parent FROM edges JOIN walk ON edges.child = walk.sha"
+            ") SELECT sha FROM walk",
+            (head,),
+        )
+        self.db.execute("DELETE FROM paths WHERE seq IN (SELECT seq FROM commits WHERE sha NOT IN reach)")
+        self.db.execute("DELETE FROM edges WHERE child NOT IN reach")
+        self.db.execute("DELETE FROM commits WHERE sha NOT IN reach")
+
+    def query(
+        self,
+        count: Optional[int] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        author: Optional[str] = None,
+        path: Optional[str] = None,
+        bodies: bool = True,
+    ) -> Iterator[Commit]:
+        """
+        Indexed commits, newest committer date first, like git log.
+
+        Commits merged in after indexing may be older than ones indexed
+        before them, so insertion order isn't history order.
+
+        Args:
+            count: Optional number of commits
+            since: Optional Unix time, commits at or after it
+            until: Optional Unix time, commits at or before it
+            author: Optional regex matched against "Name <email>" (POSIX
+                basic syntax and case-sensitive, like git log --author)
+            path: Optional file or directory the commits touched
+
+        Yields:
+            Commit records
+
+        Raises:
+            RuntimeError: If author is not a valid regex
+        """
+        where, args = [], []
+        if since is not None:
+            where.append("time >= ?")
+            args.append(since)
+        if until is not None:
+            where.append("time <= ?")
+            args.append(until)
+        if author:
+            pattern = _posix_regex(author)
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise RuntimeError(f"Invalid regular expression for author '{author}': {e}")
+            where.append("author || ' <' || email || '>' REGEXP ?")
+            args.append(pattern)
+        if path:
+            path = path.strip("/")
+            where.append("seq IN (SELECT seq FROM paths WHERE path = ? OR path LIKE ? ESCAPE '\\')")
+            args += [path, f"{_escape(path)}/%"]
+        body = "body" if bodies else "''"
+        sql = f"SELECT sha, parents, author, date, subject, {body} FROM commits"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY time DESC, seq DESC"
+        if count is not None:
+            sql += " LIMIT ?"
+            args.append(count)
+        for row in self.db.execute(sql, args):
+            yield Commit(*row)
+
+
+def _regexp(pattern: str, text: str) -> bool:
+    """SQLite's REGEXP operator (text REGEXP pattern)."""
+    return re.search(pattern, text) is not None
+
+
+def _posix_regex(pattern: str) -> str:
+    """
+    A POSIX basic regex (what git log --author takes, GNU flavour) as a
+    Python regex: \\( \\) \\| \\+ \\? \\{ \\} are operators and the bare
+    characters are literal, backslashes in brackets are literal, and a
+    leading * matches a star.
+    """
+    out = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            out.append(escaped if escaped in _BRE_SWAPPED else "\\" + escaped)
+            i += 2
+            continue
+        if char == "[":
+            end = i + 1
+            if pattern[end:end + 1] == "^":
+                end += 1
+            if pattern[end:end + 1] == "]":
+                end += 1  # A ] first in the brackets is a literal
+            end = pattern.find("]", end)
+            if end != -1:
+                inside = pattern[i + 1:end].replace("\\", "\\\\").replace("[", "\\[")
+                out.append(f"[{inside}]")
+                i = end + 1
+                continue
+        if char in _BRE_SWAPPED or (char == "*" and (not out or out[-1] in ("^", "(", "|"))):
+            out.append("\\" + char)
+        else:
+            out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def _escape(text: str) -> str:
+    """Escape LIKE wildcards."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _git(args: list[str]) -> str:
+    try:
+        result = subprocess.run(["git", *args], capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Git command failed: {e.stderr.strip()}")
+    except FileNotFoundError:
+        raise RuntimeError("Git not found. Is git installed?")
+    return result.stdout
+
+
+def _current_head() -> Optional[str]:
+    """HEAD's SHA, read from the files when possible, None before the first commit."""
+    from .git_objects import GitObjectError, Repository
+    try:
+        with Repository.discover() as repo:
+            return repo.head()
+    except GitObjectError:
+        pass
+    try:
+        return _git(["rev-parse", "--verify", "-q", "HEAD"]).strip() or None
+    except RuntimeError:
+        return None
+
+
+def _log(head: str, exclude: Optional[str] = None) -> Iterator[tuple]:
+    """
+    Commits reachable from head but not from exclude, oldest first, as
+    (sha, parents, author, email, date, time, subject, body, paths).
+    Streamed from git log -z --name-only.
+
+    Raises:
+        RuntimeError: If git fails (e.g. exclude no longer exists)
+    """
+    cmd = ["git", "log", "-z", "--reverse", "--name-only", "--no-renames", f"--pretty=format:{_FORMAT}", head]
+    if exclude:
+        cmd.append(f"^{exclude}")
+    errors = tempfile.TemporaryFile()  # Not a pipe: unread, a full one would stall git
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors)
+    except FileNotFoundError:
+        errors.close()
+        raise RuntimeError("Git not found. Is git installed?")
+    with errors, proc:
+        record = None
+        pending = b""
+        try:
+            while True:
+                chunk = proc.stdout.read1(65536)
+                tokens = (pending + chunk).split(b"\0")
+                pending = tokens.pop() if chunk else b""
+                for token in tokens:
+                    text = token.decode("utf-8", errors="replace")
+                    if "\x1e" in text:  # A commit's fields, maybe followed by its first path
+                        if record:
+                            yield record
+                        fields, _, first = text.partition("\x1e")
+                        sha, parents, author, email, date, time, subject, body = fields.lstrip("\n").split("\x1f", 7)
+                        record = (sha, parents.split(), author, email, date, int(time), subject.strip(), body.strip(), [])
+                        text = first.lstrip("\n")
+                    if text and record:
+                        record[-1].append(text)
+                if not chunk:
+                    break
+            if record:
+                yield record
+        except GeneratorExit:
+            proc.kill()  # Closed early: the rest of the log isn't needed
+            raise
+        if proc.wait():
+            errors.seek(0)
+            raise RuntimeError(f"Git command failed: {errors.read().decode('utf-8', errors='replace').strip()}")
@@ -0,0 +1,31 @@
+"""
+Configuration loading.
+The .env file is read on first need rather than at import, so commands
+that don't talk to the model don't pay for it.
+"""
+
+from pathlib import Path
+
+CONFIG_DIR = Path.home() / ".config" / "sinner"
+ENV_FILE = CONFIG_DIR / ".env"
+
+_loaded = False
+
+
+def load_config():
+    """
+    Load settings into the environment, once per process.
+
+    Reads the global config (~/.config/sinner/.env), falling back to a
+    local .env for development/testing. Variables already set in the
+    environment win.
+    """
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    from dotenv import load_dotenv
+    if ENV_FILE.exists():
+        load_dotenv(ENV_FILE)
+    else:
+        load_dotenv()
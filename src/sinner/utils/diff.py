@@ -0,0 +1,202 @@
+"""
+Unified diff parsing and hunk ranking for commit messages.
+Reads a diff line by line, so multi-megabyte diffs never sit in memory
+whole, and orders its hunks by how much they say about the change.
+"""
+
+import math
+import re
+from typing import Iterable, Optional
+
+# A hunk keeps at most this many lines; the rest is counted, not stored
+MAX_HUNK_LINES = 80
+
+# Total size of the hunks handed to the prompt, before the model's budget
+MAX_DIFF_CHARS = 48_000
+
+# Files listed in the overview before "and N more"
+MAX_FILES = 40
+
+LOCKFILES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "bun.lockb",
+    "poetry.lock", "Pipfile.lock", "uv.lock", "pdm.lock", "Cargo.lock", "go.sum",
+    "composer.lock", "Gemfile.lock", "mix.lock", "pubspec.lock", "flake.lock",
+}
+GENERATED_DIRS = ("dist/", "build/", "vendor/", "node_modules/", "__generated__/", ".next/")
+GENERATED_SUFFIXES = (".min.js", ".min.css", ".map", "_pb2.py", "_pb2_grpc.py", ".pb.go", ".snap")
+GENERATED_MARKERS = ("@generated", "DO NOT EDIT", "auto-generated", "autogenerated")
+
+# How much a change to a kind of file says about the commit
+SOURCE = {
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".go", ".rs", ".java", ".kt", ".c", ".h", ".cc", ".cpp",
+    ".hpp", ".cs", ".rb", ".php", ".swift", ".scala", ".sh", ".sql", ".vue", ".svelte",
+}
+CONFIG = {".toml", ".yaml", ".yml", ".json", ".ini", ".cfg", ".env", ".xml", ".gradle"}
+DOCS = {".md", ".rst", ".txt", ".adoc"}
+WEIGHTS = {"source": 1.0, "test": 0.7, "config": 0.6, "docs": 0.5, "other": 0.6}
+
+_HUNK = re.compile(r"^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+
+class FileDiff:
+    """One file of a diff, with its churn and why it is left out, if it is."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.status = ""  # "new", "deleted", "renamed from ..." or ""
+        self.added = 0
+        self.removed = 0
+        self.skip: Optional[str] = skip_reason(path)
+
+    @property
+    def kind(self) -> str:
+        return file_kind(self.path)
+
+    def summary(self) -> str:
+        """One overview line: path, churn, status."""
+        notes = [note for note in (self.status, self.skip and f"{self.skip}, not shown") if note]
+        extra = f" ({'; '.join(notes)})" if notes else ""
+        return f"{self.path} +{self.added} -{self.removed}{extra}"
+
+
+class Hunk:
+    """One @@ hunk: its lines (capped at MAX_HUNK_LINES) and churn."""
+
+    def __init__(self, file: FileDiff, header: str):
+        self.file = file
+        self.header = header
+        self.lines: list[str] = []
+        self.omitted = 0
+        self.added = 0
+        self.removed = 0
+
+    def add(self, line: str):
+        if line.startswith("+"):
+            self.added += 1
+        elif line.startswith("-"):
+            self.removed += 1
+        if len(self.lines) < MAX_HUNK_LINES:
+            self.lines.append(line)
+        else:
+            self.omitted += 1
+
+    @property
+    def score(self) -> float:
+        """Importance: the file kind's weight times the (diminishing) churn."""
+        return WEIGHTS[self.file.kind] * (1 + math.log1p(self.added + self.removed))
+
+    def text(self) -> str:
+        """The hunk as diff text, headed by its file."""
+        tail = f"\n[... {self.omitted} more lines]" if self.omitted else ""
+        return f"{self.file.path} {self.header}\n" + "\n".join(self.lines) + tail
+
+
+def skip_reason(path: str) -> Optional[str]:
+    """Why a file's hunks don't belong in the prompt (lockfile, generated), if they don't."""
+    name = path.rsplit("/", 1)[-1]
+    if name in LOCKFILES:
+        return "lockfile"
+    if path.endswith(GENERATED_SUFFIXES) or any(f"/{d}" in f"/{path}" for d in GENERATED_DIRS):
+        return "generated"
+    return None
+
+
+def file_kind(path: str) -> str:
+    """source, test, config, docs or other, from the path."""
+    name = path.rsplit("/", 1)[-1].lower()
+    suffix = name[name.rfind("."):] if "." in name else ""
+    if "test" in name or "/tests/" in f"/{path.lower()}" or ".spec." in name:
+        return "test"
+    if suffix in SOURCE:
+        return "source"
+    if suffix in CONFIG or name in ("dockerfile", "makefile"):
+        return "config"
+    if suffix in DOCS:
+        return "docs"
+    return "other"
+
+
+def parse_diff(lines: Iterable[str]) -> tuple[list[FileDiff], list[Hunk]]:
+    """
+    Parse a unified diff (git diff output) into files and hunks.
+
+    Hunks of skipped files are counted but not kept; neither are binary
+    files' contents. A generated-code marker near the top of a hunk
+    skips the whole file.
+
+    Args:
+        lines: Diff lines, e.g. streamed from git
+
+    Returns:
+        Files in diff order, and the hunks of the files that aren't skipped
+    """
+    files: list[FileDiff] = []
+    hunks: list[Hunk] = []
+    file: Optional[FileDiff] = None
+    hunk: Optional[Hunk] = None
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.startswith("diff --git "):
+            # "diff --git a/path b/path"; +++ below has the exact new path
+            path = line.split(" b/", 1)[-1]
+            file = FileDiff(path)
+            files.append(file)
+            hunk = None
+            continue
+        if file is None:
+            continue
+        if hunk is None:
+            if line.startswith("new file mode"):
+                file.status = "new"
+            elif line.startswith("deleted file mode"):
+                file.status = "deleted"
+            elif line.startswith("rename from "):
+                file.status = f"renamed from {line[len('rename from '):]}"
+            elif line.startswith("Binary files"):
+                file.status = "binary"
+                file.skip = file.skip or "binary"
+            elif line.startswith("+++ ") and line[4:] != "/dev/null":
+                file.path = line[6:] if line.startswith("+++ b/") else line[4:]
+                file.skip = file.skip or skip_reason(file.path)
+        if _HUNK.match(line):
+            hunk = Hunk(file, line)
+            if file.skip is None:
+                hunks.append(hunk)
+            continue
+        if hunk is None or line[:1] not in ("+", "-", " "):
+            continue
+        hunk.add(line)
+        if line.startswith("+"):
+            file.added += 1
+        elif line.startswith("-"):
+            file.removed += 1
+        if file.skip is None and len(hunk.lines) <= 5 and any(m in line for m in GENERATED_MARKERS):
+            file.skip = "generated"
+    hunks = [h for h in hunks if h.file.skip is None]
+    return files, hunks
+
+
+def rank_hunks(hunks: list[Hunk], max_chars: int = MAX_DIFF_CHARS) -> list[str]:
+    """
+    Hunk texts, most important first, as many as fit in max_chars.
+
+    The model's token budget trims this further; max_chars keeps huge
+    diffs from being carried around (and sent to the daemon) whole.
+    """
+    ranked = []
+    used = 0
+    for hunk in sorted(hunks, key=lambda h: h.score, reverse=True):
+        text = hunk.text()
+        if used + len(text) > max_chars and ranked:
+            continue  # A smaller, less important hunk may still fit
+        ranked.append(text)
+        used += len(text)
+    return ranked
+
+
+def overview(files: list[FileDiff]) -> str:
+    """The changed files, one line each, capped at MAX_FILES."""
+    lines = [f.summary() for f in files[:MAX_FILES]]
+    if len(files) > MAX_FILES:
+        lines.append(f"... and {len(files) - MAX_FILES} more files")
+    return "\n".join(lines)
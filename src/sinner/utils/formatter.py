@@ -5,6 +5,13 @@ Removes emojis and excessive markdown.
 
 import re
 
+EMOJI_PATTERN = re.compile(
+    r'[\U0001F600-\U0001F64F]|[\U0001F300-\U0001F5FF]|'
+    r'[\U0001F680-\U0001F6FF]|[\U0001F700-\U0001F77F]|'
+    r'[\U0001F800-\U0001F8FF]|[\U0001F900-\U0001F9FF]|'
+    r'[\U0001FA00-\U0001FAFF]|[\U00002700-\U000027BF]'
+)
+
 
 class OutputFormatter:
     """Clean and format LLM output for professional use."""
@@ -20,21 +27,7 @@ class OutputFormatter:
         Returns:
             Cleaned text ready for paste
         """
-        # Remove emojis
-        cleaned = re.sub(
-            r'[\U0001F600-\U0001F64F]|[\U0001F300-\U0001F5FF]|'
-            r'[\U0001F680-\U0001F6FF]|[\U0001F700-\U0001F77F]|'
-            r'[\U0001F800-\U0001F8FF]|[\U0001F900-\U0001F9FF]|'
-            r'[\U0001FA00-\U0001FAFF]|[\U00002700-\U000027BF]',
-            '',
-            raw_output
-        )
-        
-        # Remove excessive markdown (but keep basic formatting)
-        # Remove all bold/italic markers
-        cleaned = re.sub(r'\*\*\*', '', cleaned)  # Remove triple asterisks
-        cleaned = re.sub(r'\*\*', '', cleaned)    # Remove double asterisks (bold)
-        cleaned = re.sub(r'__', '', cleaned)       # Remove underscores (bold)
+        cleaned = OutputFormatter._strip_markup(raw_output)
         
         # Strip excessive whitespace but preserve paragraph breaks
         lines = [line.strip() for line in cleaned.split('\n')]
@@ -46,6 +39,19 @@ class OutputFormatter:
         
         return cleaned.strip()
     
+    @staticmethod
+    def _strip_markup(text: str) -> str:
+        """Remove emojis and bold/italic markers."""
+        # Remove emojis
+        cleaned = EMOJI_PATTERN.sub('', text)
+        
+        # Remove excessive markdown (but keep basic formatting)
+        # Remove all bold/italic markers
+        cleaned = re.sub(r'\*\*\*', '', cleaned)  # Remove triple asterisks
+        cleaned = re.sub(r'\*\*', '', cleaned)    # Remove double asterisks (bold)
+        cleaned = re.sub(r'__', '', cleaned)       # Remove underscores (bold)
+        return cleaned
+    
     @staticmethod
     def format_pr_comment(raw_output: str) -> str:
         """
@@ -86,6 +92,7 @@ class OutputFormatter:
                     title = line.rstrip('.')
         else:
             # Convert prose to bullets
+            title = None
             # Remove any leading dash, number, or bullet
             cleaned = re.sub(r'^[-•\*\d]+\.?\s*', '', cleaned.strip())
             
@@ -133,3 +140,111 @@ class OutputFormatter:
             return f"{title}\n\n" + "\n".join(bullets)
         
         return cleaned
+
+
+class StreamFormatter:
+    """
+    Incremental counterpart of OutputFormatter for streamed responses.
+    
+    Feed raw token chunks as they arrive; each call returns the cleaned text
+    that is now final. Concatenating every feed() result and finish() gives
+    exactly OutputFormatter.clean_output (or format_pr_comment with
+    pr_layout=True) of the full response.
+    
+    Text is released mid-line up to the last character that cannot change:
+    trailing whitespace, dots and '*'/'_' runs are held until the next
+    character or line end decides them. The first line keeps its tail until
+    a second line appears, since single-line output loses its trailing period.
+    The PR layout reshapes the whole response, so it is only released by finish().
+    """
+
+    _HOLD = "*_."
+
+    def __init__(self, pr_layout: bool = False):
+        self.pr_layout = pr_layout
+        self._chunks: list[str] = []
+        self._line = ""          # Current line, emojis already removed
+        self._sent = 0           # Cleaned chars of the current line already released
+        self._started = False    # Current line has released text
+        self._lines = 0          # Non-empty lines seen so far
+        self._held = ""          # Unreleased tail of the first line
+
+    def feed(self, chunk: str) -> str:
+        """
+        Add a raw chunk and return newly final cleaned text.
+        
+        Args:
+            chunk: Raw text from the LLM stream
+            
+        Returns:
+            Cleaned text to append to the output (may be empty)
+        """
+        if self.pr_layout:
+            self._chunks.append(chunk)
+            return ""
+        
+        # Emoji removal is per character, so it is safe across chunk boundaries
+        *complete, rest = EMOJI_PATTERN.sub('', chunk).split('\n')
+        out = []
+        for part in complete:
+            self._line += part
+            out.append(self._end_line())
+        self._line += rest
+        out.append(self._advance())
+        return "".join(out)
+
+    def finish(self) -> str:
+        """
+        Flush the stream.
+        
+        Returns:
+            Remaining cleaned text
+        """
+        if self.pr_layout:
+            return OutputFormatter.format_pr_comment("".join(self._chunks))
+        
+        out = self._end_line()
+        if self._lines == 1:
+            # Single-line output: drop the trailing period like clean_output
+            out += self._held.rstrip('.').rstrip()
+            self._held = ""
+        return out
+
+    def _advance(self) -> str:
+        """Release the part of the current line that can no longer change."""
+        cut = len(self._line)
+        while cut and (self._line[cut - 1] in self._HOLD or self._line[cut - 1].isspace()):
+            cut -= 1
+        if not cut:
+            return ""
+        cleaned = OutputFormatter._strip_markup(self._line[:cut]).lstrip()
+        return self._release(cleaned, line_done=False)
+
+    def _end_line(self) -> str:
+        """Release the rest of a completed line and reset line state."""
+        cleaned = OutputFormatter._strip_markup(self._line).strip()
+        out = self._release(cleaned, line_done=True)
+        self._line = ""
+        self._sent = 0
+        self._started = False
+        return out
+
+    def _release(self, cleaned: str, line_done: bool) -> str:
+        """Return the unreleased part of the current cleaned line."""
+        out = ""
+        if cleaned and not self._started:
+            self._started = True
+            self._lines += 1
+            if self._lines == 2:
+                # First line was not the only one, its tail is final now
+                out += self._held
+                self._held = ""
+            if self._lines > 1:
+                out += "\n"
+        
+        if self._started and self._lines == 1 and line_done:
+            self._held = cleaned[self._sent:]
+        else:
+            out += cleaned[self._sent:]
+        self._sent = len(cleaned)
+        return out
@@ -1,10 +1,41 @@
 """
-Light git integration for reading commit history.
-No diff parsing today.
+Light git integration for reading commit history and staged changes.
+Diff parsing lives in utils.diff.
 """
 
+import os
 import subprocess
-from typing import Optional
+import tempfile
+from typing import Iterator, Optional
+from . import metrics
+
+
+class Commit:
+    """One commit from git log, kept compact."""
+
+    __slots__ = ("sha", "parents", "author", "date", "subject", "body")
+
+    def __init__(self, sha: str, parents: int, author: str, date: str, subject: str, body: str = ""):
+        self.sha = sha
+        self.parents = parents
+        self.author = author
+        self.date = date  # ISO 8601, author date
+        self.subject = subject
+        self.body = body
+
+    @classmethod
+    def parse(cls, record: str) -> "Commit":
+        """Build from a record of iter_commits' format (fields split by \\x1f)."""
+        sha, parents, author, date, subject, *body = record.lstrip("\n").split("\x1f", 5)
+        return cls(sha, len(parents.split()), author, date, subject.strip(), body[0].strip() if body else "")
+
+    @property
+    def text(self) -> str:
+        """Subject, and body if any, as the model sees the commit."""
+        return f"{self.subject}\n\n{self.body}" if self.body else self.subject
+
+    def __repr__(self):
+        return f"Commit({self.sha[:10]!r}, {self.subject!r})"
 
 
 class GitIntegration:
@@ -25,30 +56,254 @@ class GitIntegration:
         Raises:
             RuntimeError: If not in a git repository or git command fails
         """
-        try:
-            cmd = ["git", "log", f"-{count}", "--pretty=format:%s"]
+        return [subject for _, subject in GitIntegration.get_recent_commits_with_sha(count, since)]
+
+    @staticmethod
+    def get_recent_commits_with_sha(count: int = 5, since: Optional[str] = None) -> list[tuple[str, str]]:
+        """
+        Get recent commits as (sha, subject) pairs, newest first.
+        
+        Args:
+            count: Number of commits to retrieve (default: 5)
+            since: Optional date string (e.g., "2 weeks ago", "2024-01-01")
             
-            if since:
-                cmd.insert(2, f"--since={since}")
+        Returns:
+            List of (full SHA, commit message) tuples
             
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+        Raises:
+            RuntimeError: If not in a git repository or git command fails
+        """
+        with metrics.span("git.log"):
+            return [
+                (commit.sha, commit.subject)
+                for commit in GitIntegration.iter_commits(count=count, since=since, bodies=False)
+                if commit.subject
+            ]
+
+    @staticmethod
+    def iter_commits(
+        count: Optional[int] = None,
+        since: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        bodies: bool = True,
+        until: Optional[str] = None,
+        author: Optional[str] = None,
+        path: Optional[str] = None,
+    ) -> Iterator["Commit"]:
+        """
+        Stream commits from `git log`, newest first, without buffering the history.
+        
+        Reads NUL-delimited records (git log -z) as git writes them. git
+        is stopped as soon as the caller stops iterating, count is
+        reached, or the next commit would go over max_tokens. With
+        SINNER_GIT_INDEX=1 the commits come from the repository's commit
+        index instead, brought up to date first.
+        
+        Args:
+            count: Optional number of commits to read
+            since: Optional date string (e.g., "2 weeks ago", "2024-01-01")
+            max_tokens: Optional budget for the commits' text (estimated)
+            bodies: Read commit bodies too, not only subjects
+            until: Optional date string, commits up to then
+            author: Optional author name or email (part of it, case-sensitive)
+            path: Optional file or directory the commits touched
             
-            commits = [line.strip() for line in result.stdout.split("\n") if line.strip()]
-            return commits
+        Yields:
+            Commit records
             
+        Raises:
+            RuntimeError: If not in a git repository or git command fails
+        """
+        used = 0
+        if max_tokens is not None:
+            from ..core.budget import estimate_tokens
+        
+        query = {"count": count, "since": since, "until": until, "author": author, "path": path}
+        commits = GitIntegration._read_commits(query, bodies)
+        try:
+            for read, commit in enumerate(commits):
+                if count is not None and read >= count:
+                    return
+                if max_tokens is not None:
+                    used += estimate_tokens(commit.text)
+                    if used > max_tokens:
+                        return
+                yield commit
+        finally:
+            commits.close()  # Stops git, or closes the mmap'd packs
+
+    @staticmethod
+    def backend() -> str:
+        """How history is read: git (the CLI, default) or python (in-process, SINNER_GIT_BACKEND)."""
+        return os.getenv("SINNER_GIT_BACKEND", "git").strip().lower()
+
+    @staticmethod
+    def _read_commits(query: dict, bodies: bool) -> Iterator[Commit]:
+        """The commits a query asks for, from the index or the chosen backend."""
+        if os.getenv("SINNER_GIT_INDEX", "0").strip().lower() in ("1", "true", "yes", "on"):
+            index = GitIntegration._open_index()
+            if index is not None:
+                with index:
+                    dates = GitIntegration._dates(query["since"], query["until"])
+                    yield from index.query(
+                        count=query["count"], author=query["author"], path=query["path"], bodies=bodies, **dates
+                    )
+                return
+        # Dates take git's expressions ("2 weeks ago") and filters need diffs, only the CLI has them
+        filtered = any(query[key] for key in ("since", "until", "author", "path"))
+        if GitIntegration.backend() == "python" and not filtered:
+            from .git_objects import GitObjectError, Repository
+            try:
+                repo = Repository.discover()
+            except GitObjectError:
+                repo = None  # Not something the reader handles, let git do it
+            if repo is not None:
+                with repo:
+                    try:
+                        yield from repo.walk(bodies)
+                    except GitObjectError as e:
+                        raise RuntimeError(f"Git read failed: {e}")
+                return
+        yield from GitIntegration._git_log(query, bodies)
+
+    @staticmethod
+    def _open_index():
+        """The repository's commit index, brought up to HEAD, or None if it can't be used."""
+        import sqlite3
+        from .commit_index import CommitIndex
+        
+        index = None
+        try:
+            index = CommitIndex.open()
+            with metrics.span("git.index"):
+                index.update()
+            return index
+        except (sqlite3.Error, OSError):
+            if index is not None:
+                index.close()
+            return None  # Unwritable or corrupt index: read git directly
+
+    @staticmethod
+    def _dates(since: Optional[str], until: Optional[str]) -> dict:
+        """git date expressions as Unix times, parsed by git itself (rev-parse --since)."""
+        args = [f"--{key}={value}" for key, value in (("since", since), ("until", until)) if value]
+        if not args:
+            return {}
+        try:
+            result = subprocess.run(["git", "rev-parse", *args], capture_output=True, text=True, check=True)
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"Git command failed: {e.stderr.strip()}")
+        times = {}
+        for arg in result.stdout.split():
+            key, _, value = arg.partition("=")
+            times["since" if key == "--max-age" else "until"] = int(value)
+        return times
+
+    @staticmethod
+    def _git_log(query: dict, bodies: bool) -> Iterator[Commit]:
+        """Commits from the git CLI (git log -z), read as git writes them."""
+        fields = "%H%x1f%P%x1f%an%x1f%aI%x1f%s" + ("%x1f%b" if bodies else "")
+        cmd = ["git", "log", "-z", f"--pretty=format:{fields}"]
+        if query["count"] is not None:
+            cmd.append(f"-{query['count']}")
+        for key in ("since", "until", "author"):
+            if query[key]:
+                cmd.append(f"--{key}={query[key]}")
+        if query["path"]:
+            cmd += ["--", query["path"]]
+        
+        errors = tempfile.TemporaryFile()  # Not a pipe: unread, a full one would stall git
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors)
         except FileNotFoundError:
+            errors.close()
             raise RuntimeError("Git not found. Is git installed?")
+        with errors, proc:
+            pending = b""
+            try:
+                while True:
+                    chunk = proc.stdout.read1(65536)
+                    records = (pending + chunk).split(b"\0")
+                    # Without more data the last record is complete, otherwise it may be cut
+                    pending = records.pop() if chunk else b""
+                    for record in records:
+                        if not record:
+                            continue
+                        yield Commit.parse(record.decode("utf-8", errors="replace"))
+                    if not chunk:
+                        break
+            except GeneratorExit:
+                proc.kill()  # Stopped early, don't let git walk the rest of the history
+                raise
+            if proc.wait():
+                errors.seek(0)
+                raise RuntimeError(f"Git command failed: {errors.read().decode('utf-8', errors='replace').strip()}")
+
+    @staticmethod
+    def iter_staged_diff() -> Iterator[str]:
+        """
+        Stream `git diff --cached` line by line, without holding it in memory.
+        
+        Yields:
+            Diff lines, newline included
+            
+        Raises:
+            RuntimeError: If not in a git repository or git command fails
+        """
+        cmd = ["git", "diff", "--cached", "--no-color", "--no-ext-diff", "--unified=3"]
+        # Not a pipe: git can warn once per file (e.g. line endings), and a full unread pipe would stall it
+        errors = tempfile.TemporaryFile()
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=errors,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+            )
+        except FileNotFoundError:
+            errors.close()
+            raise RuntimeError("Git not found. Is git installed?")
+        with errors, proc:
+            try:
+                yield from proc.stdout
+            except GeneratorExit:
+                proc.kill()  # Reader stopped early, don't leave git blocked on a full pipe
+                raise
+            if proc.wait():
+                errors.seek(0)
+                raise RuntimeError(f"Git command failed: {errors.read().decode('utf-8', errors='replace').strip()}")
+
+    @staticmethod
+    def get_staged_changes() -> tuple[str, list[str]]:
+        """
+        Read the staged changes for a commit message.
+        
+        Returns:
+            An overview of the changed files, and the hunks worth showing
+            the model, most important first (lockfiles and generated code
+            are listed but left out). Empty if nothing is staged.
+            
+        Raises:
+            RuntimeError: If not in a git repository or git command fails
+        """
+        from .diff import overview, parse_diff, rank_hunks
+        
+        with metrics.span("git.diff"):
+            files, hunks = parse_diff(GitIntegration.iter_staged_diff())
+        return overview(files), rank_hunks(hunks)
 
     @staticmethod
     def is_git_repo() -> bool:
         """Check if current directory is in a git repository."""
+        if GitIntegration.backend() == "python":
+            from .git_objects import GitObjectError, Repository
+            try:
+                Repository.discover()
+                return True
+            except GitObjectError:
+                pass  # Not a repository, or one only git can read
         try:
             subprocess.run(
                 ["git", "rev-parse", "--git-dir"],
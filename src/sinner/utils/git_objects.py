@@ -0,0 +1,374 @@
+"""
+Read git history without spawning git.
+Refs, loose objects and packfiles (mmap'd .pack and version 2 .idx, zlib,
+offset and ref deltas) are read directly, which is enough to walk commits
+the way `git log` does. Repositories using features this reader doesn't
+know (SHA-256 objects, reftable) raise GitObjectError so callers can fall
+back to the git CLI.
+"""
+
+import heapq
+import mmap
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .git_integration import Commit
+
+# Pack object types
+OBJ_COMMIT, OBJ_TREE, OBJ_BLOB, OBJ_TAG, OBJ_OFS_DELTA, OBJ_REF_DELTA = 1, 2, 3, 4, 6, 7
+TYPE_NAMES = {OBJ_COMMIT: "commit", OBJ_TREE: "tree", OBJ_BLOB: "blob", OBJ_TAG: "tag"}
+
+IDX_MAGIC = b"\377tOc"
+
+# Delta bases kept per pack, so chains sharing a base decompress it once
+DELTA_CACHE_ENTRIES = 64
+
+
+class GitObjectError(Exception):
+    """The repository can't be read without git (unsupported or corrupt)."""
+
+
+class Pack:
+    """One packfile and its version 2 index, both mmap'd."""
+
+    def __init__(self, idx_path: Path):
+        self.idx_path = idx_path
+        self.pack_path = idx_path.with_suffix(".pack")
+        with open(idx_path, "rb") as f:
+            self.idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(self.pack_path, "rb") as f:
+            self.pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.idx[:4] != IDX_MAGIC or struct.unpack(">I", self.idx[4:8])[0] != 2:
+            self.close()
+            raise GitObjectError(f"unsupported pack index version: {idx_path.name}")
+        self.fanout = struct.unpack(">256I", self.idx[8:8 + 1024])
+        self.count = self.fanout[255]
+        self._shas = 8 + 1024
+        self._offsets = self._shas + self.count * 24  # After the SHAs and CRCs
+        self._large = self._offsets + self.count * 4
+        self._cache: OrderedDict[int, tuple[int, bytes]] = OrderedDict()
+
+    def close(self):
+        self.idx.close()
+        self.pack.close()
+
+    def offset(self, sha: bytes) -> Optional[int]:
+        """Offset of an object in the pack (binary search of the index), or None."""
+        lo = self.fanout[sha[0] - 1] if sha[0] else 0
+        hi = self.fanout[sha[0]]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self._shas + mid * 20
+            probe = self.idx[start:start + 20]
+            if probe < sha:
+                lo = mid + 1
+            elif probe > sha:
+                hi = mid
+            else:
+                pos = self._offsets + mid * 4
+                offset = struct.unpack(">I", self.idx[pos:pos + 4])[0]
+                if offset & 0x80000000:  # Index into the 8-byte offsets of packs over 2 GB
+                    pos = self._large + (offset & 0x7FFFFFFF) * 8
+                    offset = struct.unpack(">Q", self.idx[pos:pos + 8])[0]
+                return offset
+        return None
+
+    def read(self, offset: int, repo: "Repository") -> tuple[int, bytes]:
+        """The object at offset as (type, data), with deltas resolved."""
+        cached = self._cache.get(offset)
+        if cached is not None:
+            self._cache.move_to_end(offset)
+            return cached
+
+        data = self.pack
+        byte = data[offset]
+        kind = (byte >> 4) & 7
+        size = byte & 15
+        shift, pos = 4, offset + 1
+        while byte & 0x80:
+            byte = data[pos]
+            size |= (byte & 0x7F) << shift
+            shift += 7
+            pos += 1
+
+        if kind == OBJ_OFS_DELTA:
+            byte = data[pos]
+            distance = byte & 0x7F
+            pos += 1
+            while byte & 0x80:
+                byte = data[pos]
+                distance = ((distance + 1) << 7) | (byte & 0x7F)
+                pos += 1
+            kind, base = self.read(offset - distance, repo)
+            result = (kind, apply_delta(base, self._inflate(pos, size)))
+        elif kind == OBJ_REF_DELTA:
+            base_sha = data[pos:pos + 20]
+            kind, base = repo.read(base_sha.hex())
+            result = (kind, apply_delta(base, self._inflate(pos + 20, size)))
+        elif kind in TYPE_NAMES:
+            result = (kind, self._inflate(pos, size))
+        else:
+            raise GitObjectError(f"unknown object type {kind} in {self.pack_path.name}")
+
+        self._cache[offset] = result
+        if len(self._cache) > DELTA_CACHE_ENTRIES:
+            self._cache.popitem(last=False)
+        return result
+
+    def _inflate(self, pos: int, size: int) -> bytes:
+        """Decompress size bytes of zlib data starting at pos."""
+        stream = zlib.decompressobj()
+        out = []
+        step = max(size, 512) + 64  # Small objects take one pass, big ones a few
+        while not stream.eof and pos < len(self.pack):
+            out.append(stream.decompress(self.pack[pos:pos + step]))
+            pos += step
+        data = b"".join(out)
+        if len(data) != size:
+            raise GitObjectError(f"corrupt object in {self.pack_path.name}")
+        return data
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Rebuild an object from its base and a git delta (copy and insert instructions)."""
+    pos = 0
+    for _ in range(2):  # Base and result sizes, little-endian base 128
+        byte = 0x80
+        while byte & 0x80:
+            byte = delta[pos]
+            pos += 1
+    out = []
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:  # Copy from the base: which offset and size bytes follow is in the low bits
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out.append(base[offset:offset + (size or 0x10000)])
+        elif op:  # Insert the next op bytes
+            out.append(delta[pos:pos + op])
+            pos += op
+        else:
+            raise GitObjectError("corrupt delta")
+    return b"".join(out)
+
+
+class Repository:
+    """
+    A git repository read in-process.
+
+    Use as a context manager so the mmap'd packs are closed:
+        with Repository.discover() as repo:
+            for commit in repo.walk():
+                ...
+    """
+
+    def __init__(self, git_dir: Path):
+        self.git_dir = git_dir
+        commondir = git_dir / "commondir"  # Linked worktrees share objects and refs
+        self.common_dir = (git_dir / commondir.read_text().strip()).resolve() if commondir.exists() else git_dir
+        config = self.common_dir / "config"
+        settings = config.read_text(errors="replace").lower() if config.exists() else ""
+        if "objectformat" in settings or "refstorage" in settings:
+            raise GitObjectError("repository uses an object format or ref storage this reader doesn't support")
+        self.object_dirs = self._object_dirs(self.common_dir / "objects")
+        self._packs: Optional[list[Pack]] = None
+        shallow = self.common_dir / "shallow"
+        self.shallow = set(shallow.read_text().split()) if shallow.exists() else set()
+
+    @classmethod
+    def discover(cls, start: Optional[str] = None) -> "Repository":
+        """
+        Find the repository containing start (default: the current directory).
+
+        Raises:
+            GitObjectError: If there is none, or it can't be read without git
+        """
+        if os.getenv("GIT_DIR"):
+            return cls(Path(os.environ["GIT_DIR"]).resolve())
+        path = Path(start or os.getcwd()).resolve()
+        for folder in (path, *path.parents):
+            dot_git = folder / ".git"
+            if dot_git.is_dir():
+                return cls(dot_git)
+            if dot_git.is_file():  # Worktree or submodule: "gitdir: <path>"
+                target = dot_git.read_text().strip().partition("gitdir:")[2].strip()
+                return cls((folder / target).resolve())
+        raise GitObjectError("not a git repository")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for pack in self._packs or []:
+            pack.close()
+        self._packs = None
+
+    @staticmethod
+    def _object_dirs(objects: Path) -> list[Path]:
+        """The object directory and its alternates (objects/info/alternates)."""
+        dirs = [objects]
+        alternates = objects / "info" / "alternates"
+        if alternates.exists():
+            for line in alternates.read_text().splitlines():
+                if line.strip() and not line.startswith("#"):
+                    dirs.append((objects / line.strip()).resolve())
+        return dirs
+
+    @property
+    def packs(self) -> list[Pack]:
+        if self._packs is None:
+            self._packs = [
+                Pack(idx)
+                for objects in self.object_dirs
+                for idx in sorted((objects / "pack").glob("*.idx"))
+                if idx.with_suffix(".pack").exists()
+            ]
+        return self._packs
+
+    def head(self) -> Optional[str]:
+        """SHA HEAD points at, or None on a branch without commits yet."""
+        return self.resolve("HEAD")
+
+    def resolve(self, ref: str) -> Optional[str]:
+        """Follow a ref (HEAD, refs/heads/main) to a SHA through symbolic refs and packed-refs."""
+        for _ in range(10):  # Symbolic ref chains are short; this stops loops
+            base = self.git_dir if ref == "HEAD" or not ref.startswith("refs/") else self.common_dir
+            path = base / ref
+            if path.is_file():
+                value = path.read_text().strip()
+                if value.startswith("ref:"):
+                    ref = value[4:].strip()
+                    continue
+                return value
+            return self._packed_refs().get(ref)
+        raise GitObjectError(f"symbolic ref loop at {ref}")
+
+    def _packed_refs(self) -> dict[str, str]:
+        refs = {}
+        packed = self.common_dir / "packed-refs"
+        if packed.exists():
+            for line in packed.read_text().splitlines():
+                if line and line[0] not in "#^":
+                    sha, _, name = line.partition(" ")
+                    refs[name] = sha
+        return refs
+
+    def read(self, sha: str) -> tuple[int, bytes]:
+        """
+        An object's (type, data), from the loose objects or the packs.
+
+        Raises:
+            GitObjectError: If the object doesn't exist
+        """
+        binary = bytes.fromhex(sha)
+        for attempt in range(2):
+            # Packs first: in a big history nearly everything is packed
+            for pack in self.packs:
+                offset = pack.offset(binary)
+                if offset is not None:
+                    return pack.read(offset, self)
+            for objects in self.object_dirs:
+                loose = objects / sha[:2] / sha[2:]
+                if loose.is_file():
+                    header, _, data = zlib.decompress(loose.read_bytes()).partition(b"\0")
+                    kind = header.split(b" ", 1)[0].decode()
+                    return next(k for k, name in TYPE_NAMES.items() if name == kind), data
+            self.close()  # A repack may have moved it into a new pack, look again
+        raise GitObjectError(f"object {sha} not found")
+
+    def commit(self, sha: str) -> tuple[Commit, int, list[str]]:
+        """A commit record, its committer time and its parent SHAs."""
+        kind, data = self.read(sha)
+        if kind != OBJ_COMMIT:
+            raise GitObjectError(f"{sha} is a {TYPE_NAMES.get(kind, kind)}, not a commit")
+        return parse_commit(sha, data, self.shallow)
+
+    def walk(self, bodies: bool = True) -> Iterator[Commit]:
+        """
+        Commits reachable from HEAD, newest commit date first, like `git log`.
+
+        Args:
+            bodies: Include commit bodies
+
+        Raises:
+            RuntimeError: On a branch without commits (as git log would)
+            GitObjectError: If an object is missing or unreadable
+        """
+        head = self.head()
+        if head is None:
+            raise RuntimeError("Git command failed: the current branch does not have any commits yet")
+        seen = {head}
+        order = 0  # Ties keep insertion order, as git's date-sorted list does
+        commit, when, parents = self.commit(head)
+        queue = [(-when, order, head, commit, parents)]
+        while queue:
+            _, _, _, commit, parents = heapq.heappop(queue)
+            if not bodies:
+                commit.body = ""
+            yield commit
+            for parent in parents:
+                if parent not in seen:
+                    seen.add(parent)
+                    order += 1
+                    record, when, grandparents = self.commit(parent)
+                    heapq.heappush(queue, (-when, order, parent, record, grandparents))
+
+
+def parse_commit(sha: str, data: bytes, shallow: Optional[set] = None) -> tuple[Commit, int, list[str]]:
+    """Parse a raw commit object into a Commit, its committer time and its parent SHAs."""
+    header, _, message = data.partition(b"\n\n")
+    parents: list[str] = []
+    author, committed = "", 0
+    date = ""
+    encoding = "utf-8"
+    for line in header.split(b"\n"):
+        if line.startswith(b" "):
+            continue  # Continuation of a multi-line header (gpgsig, mergetag)
+        key, _, value = line.partition(b" ")
+        if key == b"parent":
+            parents.append(value.decode())
+        elif key == b"author":
+            name, _, stamp = value.decode("utf-8", errors="replace").rpartition("> ")
+            author = name.rpartition(" <")[0]
+            date = iso_date(stamp)
+        elif key == b"committer":
+            committed = int(value.rsplit(b" ", 2)[-2])
+        elif key == b"encoding":
+            encoding = value.decode()
+    if shallow and sha in shallow:
+        parents = []  # History was cut here (shallow clone)
+    try:
+        text = message.decode(encoding, errors="replace")
+    except LookupError:
+        text = message.decode("utf-8", errors="replace")
+
+    # Like git's %s and %b: the first paragraph joined into one line, then the rest
+    lines = text.strip("\n").split("\n")
+    end = next((i for i, line in enumerate(lines) if not line.strip()), len(lines))
+    subject = " ".join(line.strip() for line in lines[:end])
+    body = "\n".join(lines[end:]).strip()
+    return Commit(sha, len(parents), author, date, subject.strip(), body), committed, parents
+
+
+def iso_date(stamp: str) -> str:
+    """git's "1700000000 +0100" as ISO 8601, like %aI."""
+    seconds, _, offset = stamp.strip().partition(" ")
+    sign = -1 if offset.startswith("-") else 1
+    minutes = sign * (int(offset[1:3] or 0) * 60 + int(offset[3:5] or 0))
+    return datetime.fromtimestamp(int(seconds), timezone(timedelta(minutes=minutes))).isoformat()
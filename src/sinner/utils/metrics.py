@@ -0,0 +1,178 @@
+"""
+Lightweight timing spans and the local metrics log.
+Nothing is recorded unless a Profile is active, so instrumented code pays
+one context variable lookup when profiling is off.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+DEFAULT_METRICS_LOG = Path.home() / ".config" / "sinner" / "metrics.jsonl"
+
+_profile: ContextVar[Optional["Profile"]] = ContextVar("sinner_profile", default=None)
+_path: ContextVar[tuple] = ContextVar("sinner_span_path", default=())
+
+
+class Profile:
+    """
+    Timings and counters of one invocation.
+
+    Spans are keyed by their path (enclosing span names), so repeated
+    spans at the same place are summed and the breakdown keeps the nesting
+    in first-seen order. Safe to share with worker threads; spans from
+    parallel workers add up, so a phase can exceed 100% of wall time.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: dict[tuple, dict] = {}
+        self.counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def open(self, path: tuple):
+        """Register a span so the breakdown lists it in start order."""
+        with self._lock:
+            self.spans.setdefault(path, {"seconds": 0.0, "calls": 0})
+
+    def add(self, path: tuple, seconds: float):
+        """Add time to the span at path."""
+        with self._lock:
+            entry = self.spans.setdefault(path, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += seconds
+            entry["calls"] += 1
+
+    def count(self, name: str, n: int = 1):
+        """Add to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def timings(self) -> dict[str, float]:
+        """Milliseconds per span name, wherever it was nested."""
+        totals: dict[str, float] = {}
+        with self._lock:
+            for path, entry in self.spans.items():
+                totals[path[-1]] = totals.get(path[-1], 0.0) + entry["seconds"]
+        return {name: round(seconds * 1000, 2) for name, seconds in totals.items()}
+
+    def breakdown(self) -> str:
+        """Human-readable timing table, nested spans indented."""
+        total = time.perf_counter() - self.start
+        lines = [f"{'phase':<28}{'ms':>10}{'calls':>7}{'share':>8}"]
+        with self._lock:
+            spans = list(self.spans.items())
+        for path, entry in spans:
+            label = "  " * (len(path) - 1) + path[-1]
+            share = entry["seconds"] / total if total else 0.0
+            lines.append(f"{label:<28}{entry['seconds'] * 1000:>10.1f}{entry['calls']:>7}{share:>8.0%}")
+        lines.append(f"{'total':<28}{total * 1000:>10.1f}")
+        return "\n".join(lines)
+
+
+class _Span:
+    __slots__ = ("profile", "path", "start", "token")
+
+    def __init__(self, profile: Profile, name: str):
+        self.profile = profile
+        self.path = _path.get() + (name,)
+
+    def __enter__(self):
+        self.profile.open(self.path)
+        self.token = _path.set(self.path)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        _path.reset(self.token)
+        self.profile.add(self.path, elapsed)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """Time a block under name (a no-op unless a Profile is active)."""
+    profile = _profile.get()
+    if profile is None:
+        return _NO_SPAN
+    return _Span(profile, name)
+
+
+def record(name: str, seconds: float):
+    """Add a measured duration to the active Profile, if any."""
+    profile = _profile.get()
+    if profile is not None:
+        profile.add(_path.get() + (name,), seconds)
+
+
+def count(name: str, n: int = 1):
+    """Add to a counter of the active Profile, if any."""
+    profile = _profile.get()
+    if profile is not None:
+        profile.count(name, n)
+
+
+def current() -> Optional[Profile]:
+    """The active Profile, or None when nothing is being recorded."""
+    return _profile.get()
+
+
+def activate(profile: Profile):
+    """Make profile active for the rest of the current context."""
+    _profile.set(profile)
+
+
+@contextmanager
+def profiling(profile: Optional[Profile] = None) -> Iterator[Profile]:
+    """Record spans in profile (a new one by default) within the block."""
+    profile = profile or Profile()
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+
+
+def log_path() -> Optional[Path]:
+    """
+    Where invocation metrics are logged, or None when logging is off.
+
+    Opt in with SINNER_METRICS=1 (default file ~/.config/sinner/metrics.jsonl)
+    or point SINNER_METRICS_LOG at a file.
+    """
+    custom = os.getenv("SINNER_METRICS_LOG")
+    if custom:
+        return Path(custom).expanduser()
+    if os.getenv("SINNER_METRICS", "0").strip().lower() in ("1", "true", "yes", "on"):
+        return DEFAULT_METRICS_LOG
+    return None
+
+
+def log_invocation(path: Path, fields: dict):
+    """Append one invocation record to the metrics log (never raises)."""
+    entry = dict(fields, ts=datetime.now(timezone.utc).isoformat(timespec="milliseconds"))
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One write per record, so concurrent sinner processes don't interleave lines
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError:
+        pass
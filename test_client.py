@@ -0,0 +1,590 @@
+"""
+LLM client tests against the bundled stub server.
+Run without LLM.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add src to path
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+import requests
+
+from sinner.stub_server import StubConfig, StubServer
+
+
+def make_client(stub: StubServer):
+    """LLMClient pointed at the stub, without the on-disk cache."""
+    from sinner.core import LLMClient
+    previous = os.environ.get("LMSTUDIO_BASE_URL")
+    os.environ["LMSTUDIO_BASE_URL"] = stub.base_url
+    try:
+        return LLMClient(use_cache=False)
+    finally:
+        if previous is None:
+            del os.environ["LMSTUDIO_BASE_URL"]
+        else:
+            os.environ["LMSTUDIO_BASE_URL"] = previous
+
+
+def test_ask():
+    """Plain completions, canned by prompt."""
+    with StubServer() as stub, make_client(stub) as client:
+        assert client.ask("Generate a professional name for: x") == "validateEmail"
+        assert client.ask("anything else") == "ok"
+        assert stub.requests == 2
+    print("✓ ask returns canned responses")
+
+
+def test_ask_stream():
+    """Streamed completions join back to the full answer and record TTFT."""
+    with StubServer(StubConfig(latency=0.05, tokens_per_s=500)) as stub, make_client(stub) as client:
+        chunks = list(client.ask_stream("Generate a conventional commit message for: x"))
+        assert len(chunks) > 1
+        assert "".join(chunks).strip() == "feat(auth) -> add JWT authentication"
+        assert 0.05 <= client.last_ttft < 0.5
+    print("✓ ask_stream yields tokens and measures time to first token")
+
+
+def test_generation_limits():
+    """max_tokens and stop sequences cut a rambling model short."""
+    config = StubConfig(ramble="And here is why this is a good name.")
+    with StubServer(config) as stub, make_client(stub) as client:
+        assert client.ask("Generate a professional name for: x", stop=["\n\n"]) == "validateEmail"
+        rambling = client.ask("Generate a professional name for: x", max_tokens=10)
+        assert rambling.startswith("validateEmail\n\nAnd here")
+        assert len(rambling.split()) == 10
+        streamed = "".join(client.ask_stream("Generate a professional name for: x", stop=["\n\n"]))
+        assert streamed == "validateEmail"
+    print("✓ max_tokens and stop are honored")
+
+
+def test_async_client():
+    """AsyncLLMClient and Controller.run_async: answers, streaming and the concurrency limit."""
+    import asyncio
+    import time
+    from sinner.core import AsyncLLMClient, Controller
+    
+    async def collect(client, **kwargs):
+        return [chunk async for chunk in client.ask_stream("Generate a professional name for: x", **kwargs)]
+    
+    config = StubConfig(ramble="And here is why this is a good name.", tokens_per_s=500)
+    with StubServer(config) as stub:
+        client = AsyncLLMClient(make_client(stub), concurrency=2)
+        try:
+            assert asyncio.run(client.ask("Generate a professional name for: x", stop=["\n\n"])) == "validateEmail"
+            chunks = asyncio.run(collect(client, stop=["\n\n"]))
+            assert "".join(chunks) == "validateEmail"
+            assert "".join(asyncio.run(collect(client))).startswith("validateEmail\n\nAnd here")
+        finally:
+            client.close()
+    print("✓ Async ask and streaming honor stop sequences")
+    
+    async def run_all(controller, count):
+        return await asyncio.gather(*(controller.run_async("name", f"job {i}") for i in range(count)))
+    
+    with StubServer(StubConfig(latency=0.2)) as stub:
+        llm = make_client(stub)
+        controller = Controller(llm, async_client=AsyncLLMClient(llm, concurrency=2))
+        start = time.perf_counter()
+        assert asyncio.run(run_all(controller, 4)) == ["validateEmail"] * 4
+        elapsed = time.perf_counter() - start
+        controller.async_llm.close()
+    assert 0.4 <= elapsed < 0.6, elapsed  # Two at a time: two rounds of 0.2 s
+    print("✓ run_async runs commands concurrently, up to the concurrency limit")
+
+
+def test_errors():
+    """Transient errors are retried; client errors and open circuits are not."""
+    from sinner.core.resilience import CircuitOpenError
+    with StubServer(StubConfig(error_rate=1.0, error_status=503)) as stub, make_client(stub) as client:
+        client.retry.base = 0  # No backoff waits in tests
+        try:
+            client.ask("hi")
+        except requests.HTTPError as e:
+            assert e.response.status_code == 503
+        else:
+            raise AssertionError("expected an HTTPError")
+        assert stub.errors == 1 + client.retry.retries
+        print("✓ 5xx is retried, then raised")
+        
+        stub.config.error_status = 400
+        stub.errors = 0
+        try:
+            client.ask("hi")
+        except requests.HTTPError as e:
+            assert e.response.status_code == 400
+        else:
+            raise AssertionError("expected an HTTPError")
+        assert stub.errors == 1
+        print("✓ 4xx is not retried")
+        
+        stub.config.error_status = 503
+        client.breaker.threshold = 3
+        client.breaker.cooldown = 0.1
+        try:
+            client.ask("hi")
+        except requests.HTTPError:
+            pass
+        requests_before = stub.requests
+        try:
+            client.ask("hi")
+        except CircuitOpenError:
+            pass
+        else:
+            raise AssertionError("expected the circuit to be open")
+        assert stub.requests == requests_before
+        print("✓ Circuit opens after repeated failures and fails fast")
+        
+        stub.config.error_rate = 0.0
+        import time
+        time.sleep(0.1)
+        assert client.ask("hi") == "ok"
+        assert client.breaker.state == "closed"
+        print("✓ Trial request closes the circuit once the server recovers")
+
+
+def test_models():
+    """The model list endpoint answers like LM Studio."""
+    with StubServer(StubConfig(model="stub-a")) as stub:
+        data = requests.get(f"{stub.base_url}/models", timeout=5).json()
+        assert [m["id"] for m in data["data"]] == ["stub-a"]
+    print("✓ /v1/models lists the stub model")
+
+
+def test_balancer():
+    """Requests spread over backends; failing ones are ejected and readmitted."""
+    from sinner.core import LLMClient
+    from sinner.core.balancer import Balancer
+    with StubServer() as a, StubServer() as b, StubServer(StubConfig(error_rate=1.0)) as broken:
+        balancer = Balancer([a.base_url, b.base_url], strategy="round_robin")
+        client = LLMClient(use_cache=False, balancer=balancer)
+        for _ in range(4):
+            client.ask("hi")
+        assert (a.requests, b.requests) == (2, 2)
+        print("✓ round_robin alternates backends")
+        
+        slow = StubServer(StubConfig(latency=0.05)).start()
+        balancer = Balancer([slow.base_url, a.base_url], strategy="lowest_latency")
+        client = LLMClient(use_cache=False, balancer=balancer)
+        before = slow.requests
+        for _ in range(5):
+            client.ask("hi")
+        assert slow.requests - before == 1
+        slow.stop()
+        print("✓ lowest_latency prefers the fast backend")
+        
+        balancer = Balancer([broken.base_url, b.base_url], strategy="round_robin", eject_after=2, cooldown=0.05)
+        client = LLMClient(use_cache=False, balancer=balancer)
+        client.retry.base = 0
+        for _ in range(8):
+            assert client.ask("hi") == "ok"  # Retried on the healthy backend
+        assert broken.requests == 2
+        assert not balancer.backends[0].healthy
+        print("✓ Failing backend is ejected, its requests retried elsewhere")
+        
+        broken.config.error_rate = 0.0
+        balancer.health_check = lambda backend: True
+        import time
+        time.sleep(0.06)
+        balancer.pick()  # Starts the health check
+        time.sleep(0.05)
+        assert balancer.backends[0].healthy
+        print("✓ Ejected backend is readmitted after a passing health check")
+
+
+def test_hedging():
+    """A request stuck on a slow backend is duplicated and the fast copy wins."""
+    import time
+    from sinner.core import LLMClient
+    from sinner.core.balancer import Balancer
+    with StubServer(StubConfig(latency=3.0)) as slow, StubServer(StubConfig(latency=0.01)) as fast:
+        balancer = Balancer([slow.base_url, fast.base_url], strategy="round_robin")
+        client = LLMClient(use_cache=False, balancer=balancer)
+        assert client._hedge_delay(client.targets()[0]) is None  # Off by default
+        client.hedge = True
+        client.hedge_min_samples = 5
+        assert client._hedge_delay(client.targets()[0]) is None  # No history yet
+        client._first_token_times[client.model].extend([0.02] * 10)
+        
+        start = time.perf_counter()
+        assert "".join(client.ask_stream("Generate a professional name for: x")) == "validateEmail"
+        assert client.ask("Generate a professional name for: y") == "validateEmail"
+        assert time.perf_counter() - start < 1.0
+        assert slow.requests == 2 and fast.requests == 2  # Both started slow, both hedged
+        time.sleep(0.1)
+        # The cancelled copy is released and not held against the slow backend
+        assert [b.outstanding for b in balancer.backends] == [0, 0]
+        assert balancer.backends[0].failures == 0
+    print("✓ Hedged request is answered by the faster backend")
+    
+    with StubServer(StubConfig(latency=0.01)) as slow, StubServer(StubConfig(latency=0.01)) as fast:
+        balancer = Balancer([slow.base_url, fast.base_url], strategy="round_robin")
+        client = LLMClient(use_cache=False, balancer=balancer)
+        client.hedge = True
+        client.hedge_min_samples = 6
+        for i in range(6):
+            assert client.ask(f"Generate a professional name for: {i}") == "validateEmail"
+        assert len(client._first_token_times[client.model]) == 6  # Learned from plain asks
+        
+        slow.config.latency = 3.0
+        start = time.perf_counter()
+        assert client.ask("Generate a professional name for: z") == "validateEmail"
+        assert time.perf_counter() - start < 1.0
+        assert (slow.requests, fast.requests) == (4, 4)
+    print("✓ Non-streamed requests warm up hedging and get hedged")
+    
+    import threading
+    from sinner.core.llm_client import _Leg
+    with StubServer(StubConfig(latency=3.0)) as slow, StubServer() as fast:
+        balancer = Balancer([slow.base_url, fast.base_url], strategy="round_robin")
+        client = LLMClient(use_cache=False, balancer=balancer)
+        target = client.targets()[0]
+        backend = balancer.backends[0]
+        backend.failures = 1
+        breaker = target.breaker
+        breaker.failures = breaker.threshold
+        breaker.opened_at = time.monotonic() - breaker.cooldown - 1  # Cooled down: half-open
+        
+        leg = _Leg([])
+        payload = client._payload("hi", 0.7, client.model, stream=True)
+        
+        def read():
+            try:
+                list(client._stream(payload, leg.tried, target, leg))
+            except Exception:
+                pass  # An aborted read may fail any way; _hedged ignores what a lost leg raises
+        
+        reader = threading.Thread(target=read)
+        reader.start()
+        time.sleep(0.2)
+        leg.cancel()  # Lost the race: the slow backend hasn't answered
+        reader.join(2)
+        assert not reader.is_alive() and backend.outstanding == 0
+        assert backend.failures == 1 and backend.latency is None
+        assert breaker.state == "half_open" and breaker.failures == breaker.threshold
+        breaker.before_request()  # The cancelled trial doesn't block the next one
+    print("✓ A cancelled hedge leg neither heals nor times its backend")
+
+
+def test_routing():
+    """Commands go to their routed model and fall back along the chain."""
+    from sinner.core import Controller, LLMClient
+    from sinner.core.routing import parse_chain
+    assert parse_chain("small@q4_k_m@http://h:1/v1, big") == [("small@q4_k_m", "http://h:1/v1"), ("big", None)]
+    small_config = StubConfig(model="small", strict_model=True)
+    with StubServer(small_config) as small, StubServer(StubConfig(model="big", strict_model=True)) as big:
+        previous = os.environ.get("LMSTUDIO_BASE_URL")
+        os.environ["LMSTUDIO_BASE_URL"] = big.base_url
+        os.environ["MODEL_ID"] = "big"
+        os.environ["SINNER_ROUTE_NAME"] = f"small@{small.base_url}"
+        os.environ["SINNER_ROUTE_COMMIT"] = "missing"
+        try:
+            client = LLMClient(use_cache=False)
+        finally:
+            for key in ("MODEL_ID", "SINNER_ROUTE_NAME", "SINNER_ROUTE_COMMIT"):
+                del os.environ[key]
+            if previous is None:
+                del os.environ["LMSTUDIO_BASE_URL"]
+            else:
+                os.environ["LMSTUDIO_BASE_URL"] = previous
+        client.retry.base = 0
+        controller = Controller(client)
+        assert [t.model for t in client.targets("name")] == ["small", "big"]
+        
+        assert controller.run("name", "x") == "validateEmail"
+        assert (small.requests, big.requests) == (1, 0)
+        controller.run("explain", "x")
+        assert (small.requests, big.requests) == (1, 1)
+        print("✓ Commands run on their routed model and server")
+        
+        controller.run("commit", "x")  # "missing" is not loaded: 404, then MODEL_ID
+        assert big.requests == 3
+        small_config.error_rate = 1.0
+        assert controller.run("name", "x") == "validateEmail"
+        assert big.requests == 4
+        print("✓ Falls back along the chain when a target fails")
+
+
+def test_prompt_budget():
+    """Long commit ranges are trimmed to the context instead of overflowing it."""
+    from sinner.core import Controller
+    commits = "\n".join(f"feat(module{i}): change number {i} of the module" for i in range(300))
+    config = StubConfig(context_tokens=1500, tokenize_endpoint=True)
+    with StubServer(config) as stub, make_client(stub) as client:
+        client.retry.retries = 0
+        controller = Controller(client, chunk_tokens=100_000)  # No map-reduce, send it all
+        os.environ["SINNER_CONTEXT_TOKENS"] = "100000"
+        try:
+            controller.run("pr", commits)
+            assert False, "the stub should reject a prompt over its context"
+        except requests.HTTPError as e:
+            assert e.response.status_code == 400
+        
+        os.environ["SINNER_CONTEXT_TOKENS"] = "2000"
+        notices = []
+        try:
+            controller.run("pr", commits, on_notice=notices.append)
+        finally:
+            del os.environ["SINNER_CONTEXT_TOKENS"]
+        assert stub.tokenize_requests > 0
+        assert len(notices) == 1 and "oldest commits" in notices[0]
+    print("✓ Prompt is trimmed to the model's context, counted by the server's tokenizer")
+
+
+def test_map_reduce():
+    """Histories over the budget are reduced level by level until the final prompt fits."""
+    import threading
+    import time
+    from sinner.core import Controller, budget
+    commits = [f"feat(module{i}): change number {i} of the module with some detail" for i in range(400)]
+    levels, active, peak = [], [0], [0]
+    lock = threading.Lock()
+    chunk_commits = budget.chunk_commits
+    
+    def counted_chunks(items, budget):
+        levels.append(len(items))
+        return chunk_commits(items, budget)
+    
+    def reducer(client):
+        controller = Controller(client, chunk_tokens=200, fanout=3)
+        summarize = controller._summarize_chunk
+        
+        def tracked(chunk):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            try:
+                return summarize(chunk)
+            finally:
+                with lock:
+                    active[0] -= 1
+        
+        controller._summarize_chunk = tracked
+        return controller
+    
+    config = StubConfig(context_tokens=1500)
+    os.environ["SINNER_CONTEXT_TOKENS"] = "1500"
+    budget.chunk_commits = counted_chunks
+    try:
+        with StubServer(config) as stub, make_client(stub) as client:
+            notices = []
+            reducer(client).run("pr", "\n".join(commits), on_notice=notices.append)
+            assert len(levels) == 2 and levels[0] == 400 and levels[1] < levels[0] / 3
+            assert peak[0] == 3  # Chunks of a level run fanout at a time
+            assert notices == []  # The reduced history fits without trimming
+            print("✓ Large history is reduced level by level, fanout chunks at a time")
+            
+            # A model that answers with more lines than it was given never shrinks the list
+            wordy = "\n".join(f"- a long condensed line number {n} about the changes" for n in range(20))
+            config.responses = [("Condense this part", wordy)] + config.responses
+            levels.clear()
+            reducer(client).run("pr", "\n".join(commits), on_notice=notices.append)
+            assert len(levels) == Controller.MAX_REDUCE_LEVELS
+            assert levels[1] == levels[2] == levels[3] < levels[0]  # One joined line per chunk
+            assert len(notices) == 1 and "oldest commits" in notices[0]  # Still over: trimmed to fit
+    finally:
+        budget.chunk_commits = chunk_commits
+        del os.environ["SINNER_CONTEXT_TOKENS"]
+    print("✓ Reduction stops after MAX_REDUCE_LEVELS and the final prompt still fits")
+
+
+def test_prompt_cache():
+    """llama.cpp servers get cache_prompt and a slot per command, so the system prompt is reused."""
+    from sinner.core import Controller
+    with StubServer(StubConfig(slots=2)) as stub, make_client(stub) as client:
+        controller = Controller(client)
+        assert client._server_options(client.targets("pr")[0], "pr") == {"cache_prompt": True, "id_slot": 1}
+        assert client._server_options(client.targets("name")[0], "name") == {"cache_prompt": True, "id_slot": 0}
+        controller.run("name", "validate an email")
+        first = stub.prefill_tokens
+        controller.run("name", "parse a date")
+        assert stub.cached_tokens > 0 and stub.prefill_tokens - first < first
+    print("✓ Repeated system prompt is served from the slot's cache")
+    
+    import asyncio
+    import time
+    from sinner.core import AsyncLLMClient
+    
+    async def together(client, count):
+        return await asyncio.gather(*(client.ask(f"Generate a professional name for: {i}", command="name") for i in range(count)))
+    
+    with StubServer(StubConfig(slots=2, latency=0.3)) as stub:
+        client = AsyncLLMClient(make_client(stub), concurrency=2)
+        try:
+            start = time.perf_counter()
+            assert asyncio.run(together(client, 2)) == ["validateEmail"] * 2
+            assert time.perf_counter() - start < 0.55  # Pinned to one slot, they would queue: 0.6 s
+        finally:
+            client.close()
+    print("✓ Concurrent requests for one command aren't queued on its slot")
+    
+    with StubServer() as stub, make_client(stub) as client:
+        Controller(client).run("name", "validate an email")
+        assert stub.cached_tokens == 0
+        assert client._server_options(client.targets("name")[0], "name") == {}
+    print("✓ Servers without /props get plain requests")
+
+
+def test_summary_reuse():
+    """Range summaries are keyed by the summarize route's model and reused as the range grows."""
+    import tempfile
+    from sinner.core import Controller
+    from sinner.core.cache import SummaryStore
+    commits = [f"feat(module{i}): change number {i} of the module" for i in range(200)]
+    shas = [f"{i:040x}" for i in range(200)]
+    os.environ["SINNER_ROUTE_SUMMARIZE"] = "small"
+    with StubServer() as stub, tempfile.TemporaryDirectory() as tmp:
+        try:
+            client = make_client(stub)
+        finally:
+            del os.environ["SINNER_ROUTE_SUMMARIZE"]
+        controller = Controller(client, chunk_tokens=500)
+        controller.summaries = SummaryStore(path=Path(tmp))
+        controller.run("pr", "\n".join(commits), shas=shas)
+        first = stub.requests
+        assert controller.summaries.lookup("small", shas) is not None
+        assert controller.summaries.lookup(client.model, shas) is None
+        
+        controller.run("pr", "\n".join(["feat: newest change"] + commits), shas=["f" * 40] + shas)
+        assert stub.requests - first == 1  # The stored summary and the new commit fit one prompt
+    print("✓ Range summaries are stored per summarize model and reused")
+
+
+def test_daemon():
+    """The daemon answers ping, streams a forwarded command, reports errors and stops."""
+    import tempfile
+    import threading
+    from sinner import daemon
+    with StubServer(StubConfig(tokens_per_s=500)) as stub, tempfile.TemporaryDirectory() as tmp:
+        previous = os.environ.get("LMSTUDIO_BASE_URL")
+        os.environ["LMSTUDIO_BASE_URL"] = stub.base_url
+        os.environ["SINNER_CACHE"] = "0"
+        os.environ["SINNER_SOCKET"] = str(Path(tmp) / "sinner.sock")
+        try:
+            ready = threading.Event()
+            server = threading.Thread(target=daemon.serve, kwargs={"on_ready": lambda path: ready.set()}, daemon=True)
+            server.start()
+            assert ready.wait(5)
+            assert daemon.request({"op": "ping"})["ok"]
+            
+            tokens = []
+            result, ttft = daemon.forward("commit", "add JWT login", on_token=tokens.append)
+            assert "add JWT authentication" in result and len(tokens) > 1 and ttft is not None
+            print("✓ Daemon answers ping and streams forwarded commands")
+            
+            try:
+                daemon.request({"op": "run", "command": "nonsense", "input": "x"})
+            except daemon.DaemonError as e:
+                assert "Unsupported command" in str(e)
+            else:
+                raise AssertionError("expected a DaemonError")
+            try:
+                daemon.request({"op": "bogus"})
+            except daemon.DaemonError as e:
+                assert "unknown op" in str(e)
+            else:
+                raise AssertionError("expected a DaemonError")
+            
+            assert daemon.request({"op": "stop"})["ok"]
+            server.join(5)
+            assert not server.is_alive() and not daemon.socket_path().exists()
+            assert daemon.forward("name", "x") is None  # Nothing listening: run in-process
+        finally:
+            for key in ("SINNER_CACHE", "SINNER_SOCKET"):
+                del os.environ[key]
+            if previous is None:
+                del os.environ["LMSTUDIO_BASE_URL"]
+            else:
+                os.environ["LMSTUDIO_BASE_URL"] = previous
+    print("✓ Daemon reports errors as records and stops on request")
+
+
+def test_batch():
+    """Batch jobs come back in input order, with a bounded window and error records."""
+    import io
+    import json
+    from sinner.core import Controller
+    from sinner.core.batch import iter_results, run_batch
+    jobs = [json.dumps({"id": i, "command": "name", "input": f"job {i}"}) for i in range(20)]
+    jobs[3] = "{not json"
+    jobs[7] = json.dumps({"id": 7, "command": "nonsense", "input": "x"})
+    jobs.insert(10, "   ")
+    with StubServer(StubConfig(latency=0.02)) as stub, make_client(stub) as client:
+        controller = Controller(client)
+        out = io.StringIO()
+        summary = run_batch(controller, iter(jobs), out, workers=4)
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert summary["total"] == 20 and summary["failed"] == 2
+        assert [r["line"] for r in results] == [n for n in range(1, 22) if n != 11]
+        assert results[3]["error"].startswith("JSONDecodeError") and results[3]["id"] is None
+        assert "Unsupported command" in results[7]["error"] and results[7]["id"] == 7
+        assert all(r["output"] == "validateEmail" for i, r in enumerate(results) if i not in (3, 7))
+        print("✓ Batch results keep input order, bad jobs become error records")
+        
+        read = []
+        
+        def lines():
+            for job in jobs:
+                read.append(job)
+                yield job
+        
+        produced = 0
+        for _ in iter_results(controller, lines(), workers=2, ordered=False):
+            produced += 1
+            assert len(read) - produced <= 2 * 2 + 1  # Window of workers * 2, plus the blank line
+        assert produced == 20
+        print("✓ Batch reads ahead only as far as its in-flight window")
+
+
+def test_bench():
+    """The benchmark suite measures every corpus command."""
+    from sinner.core import Controller
+    from sinner.core.bench import CORPUS, run_bench
+    with StubServer(StubConfig(tokens_per_s=2000)) as stub, make_client(stub) as client:
+        report = run_bench(Controller(client))
+    summary = report["summary"]
+    assert summary["samples"] == len(CORPUS) and summary["errors"] == 0
+    assert summary["valid_share"] == 1.0
+    assert summary["p50_ms"] <= summary["p95_ms"]
+    assert summary["ttft_p50_ms"] is not None and summary["tokens_per_s"] > 0
+    assert set(report["commands"]) == {"name", "commit", "pr", "squash", "comment", "explain"}
+    print("✓ bench reports latency, TTFT, throughput and format validity")
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_ask,
+        test_ask_stream,
+        test_generation_limits,
+        test_async_client,
+        test_errors,
+        test_models,
+        test_balancer,
+        test_hedging,
+        test_routing,
+        test_prompt_budget,
+        test_map_reduce,
+        test_prompt_cache,
+        test_summary_reuse,
+        test_daemon,
+        test_batch,
+        test_bench,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"✗ {test.__name__} failed: {e}")
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Formatter tests: streamed cleanup must match the batch formatter exactly.
+Run without LLM.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+# Add src to path
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from sinner.utils.formatter import OutputFormatter, StreamFormatter
+
+
+# Shared corpus of raw LLM responses, batch and streamed paths both run on it
+CORPUS = [
+    "validateEmail",
+    "validateEmail.",
+    "**validateEmail**",
+    "feat(auth) -> add JWT authentication.",
+    "feat(auth) -> add JWT authentication 🚀...",
+    "  fix(core) -> handle ___empty___ input .  ",
+    "fix(api) -> resolve __init__ import loop",
+    "Hey! So the **auth system** got a nice refactoring 😀.\n\nJWT handling was moved into a service.\n",
+    "Updated project configuration\n\n- Formatter: Standardized bullet points, removed bold markdown\n"
+    "- Commands: Restructured Git commands, added terminal signature.\n",
+    "* **Formatter**: normalized the bullet points across outputs\n* Commands were restructured for clarity",
+    "The formatter was updated to normalize bullets. Git commands were restructured. "
+    "A post-processor now adds the PR and squash distinction.",
+    "1. Added retry handling to the client code\n2. Fixed the broken configuration loader\n",
+    "A closure is a function that captures variables ✨ from its enclosing scope.\n"
+    "\n"
+    "Think of it as a ***LEGO*** brick that remembers *where* it was built.\n"
+    "   \n"
+    "...",
+    "*_*_ single stars * and _ lone underscores _ stay",
+    "****\n__\n...\n",
+    "",
+    "\n\n   \n",
+    "line one.\r\nline two.\r\n",
+]
+
+
+def _chunked(text: str, rng: random.Random) -> list[str]:
+    """Split text into random token-sized chunks."""
+    chunks = []
+    i = 0
+    while i < len(text):
+        n = rng.randint(1, 6)
+        chunks.append(text[i:i + n])
+        i += n
+    return chunks
+
+
+def _stream(chunks: list[str], pr_layout: bool = False) -> str:
+    formatter = StreamFormatter(pr_layout=pr_layout)
+    return "".join(formatter.feed(c) for c in chunks) + formatter.finish()
+
+
+def test_stream_matches_clean_output():
+    """Every chunking of the corpus cleans to exactly clean_output."""
+    print("Testing streamed clean_output...")
+    rng = random.Random(7)
+    for text in CORPUS:
+        expected = OutputFormatter.clean_output(text)
+        assert _stream([text]) == expected
+        assert _stream(list(text)) == expected
+        for _ in range(50):
+            assert _stream(_chunked(text, rng)) == expected, repr(text)
+    print(f"✓ {len(CORPUS)} corpus entries match clean_output")
+
+
+def test_stream_matches_pr_layout():
+    """PR layout streaming matches format_pr_comment."""
+    print("\nTesting streamed format_pr_comment...")
+    rng = random.Random(11)
+    for text in CORPUS:
+        expected = OutputFormatter.format_pr_comment(text)
+        assert _stream(_chunked(text, rng), pr_layout=True) == expected, repr(text)
+    print(f"✓ {len(CORPUS)} corpus entries match format_pr_comment")
+
+
+def test_stream_fuzz():
+    """Random markup-heavy text cleans identically in both paths."""
+    print("\nTesting random markup...")
+    rng = random.Random(3)
+    alphabet = list("ab .*_\n\t") + ["😀", "**", "__", "***", "...", "\n\n"]
+    for _ in range(5000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert _stream(_chunked(text, rng)) == OutputFormatter.clean_output(text), repr(text)
+    print("✓ 5000 random inputs match")
+
+
+def test_stream_is_incremental():
+    """Text is released before the response ends."""
+    print("\nTesting incremental release...")
+    formatter = StreamFormatter()
+    assert formatter.feed("Hey! So the ") == "Hey! So the"
+    assert formatter.feed("**auth") == " auth"
+    assert formatter.feed("**") == ""
+    assert formatter.feed(" system got updated.") == " system got updated"
+    assert formatter.feed("\n") == ""  # single-line output would drop the period
+    assert formatter.feed("Next line") == ".\nNext line"
+    assert formatter.finish() == ""
+    print("✓ Cleaned text streams mid-line")
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_stream_matches_clean_output,
+        test_stream_matches_pr_layout,
+        test_stream_fuzz,
+        test_stream_is_incremental,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"✗ {test.__name__} failed: {e}")
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())